@@ -0,0 +1,157 @@
+"""Admission control for expensive endpoints (model inference).
+
+`AdmissionController` caps how many requests run at once and how many may
+wait for a slot. A request is shed immediately when the wait queue is full
+or when the expected wait (queue position x recent service time) already
+exceeds the queue deadline; one that is admitted to the queue but not
+served before the deadline is shed as well. Admitted requests therefore
+never wait longer than the deadline, and overload turns into fast 503s
+instead of unbounded latency for everyone.
+
+`ClientRateLimiter` is a per-client token bucket applied before admission,
+so a single noisy caller gets 429s instead of filling the shared queue.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+
+class Shed(Exception):
+    """Raised when a request is not admitted; `reason` says why."""
+
+    def __init__(self, reason, retry_after=1):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded concurrency with a bounded, deadline-limited wait queue."""
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout):
+        self.max_concurrent = max(int(max_concurrent), 1)
+        self.max_queue = max(int(max_queue), 0)
+        self.queue_timeout = float(queue_timeout)
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._service_ewma = 0.0  # seconds per request, smoothed
+        self._waits = deque(maxlen=1024)
+        self.counters = {'admitted': 0, 'queued': 0, 'shed_queue_full': 0,
+                         'shed_deadline': 0, 'shed_timeout': 0}
+
+    def _expected_wait(self):
+        # Requests ahead of us drain max_concurrent at a time
+        return (self._waiting + 1) * self._service_ewma / self.max_concurrent
+
+    def acquire(self):
+        """Take a slot or raise Shed; returns the seconds spent queued."""
+        with self._cond:
+            if self._active < self.max_concurrent and self._waiting == 0:
+                self._active += 1
+                self.counters['admitted'] += 1
+                self._waits.append(0.0)
+                return 0.0
+            if self._waiting >= self.max_queue:
+                self.counters['shed_queue_full'] += 1
+                raise Shed('queue_full')
+            if self._expected_wait() > self.queue_timeout:
+                self.counters['shed_deadline'] += 1
+                raise Shed('deadline')
+            start = time.monotonic()
+            deadline = start + self.queue_timeout
+            self._waiting += 1
+            self.counters['queued'] += 1
+            try:
+                while self._active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.counters['shed_timeout'] += 1
+                        self._cond.notify()  # pass on a wakeup we may have consumed
+                        raise Shed('timeout')
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._active += 1
+            self.counters['admitted'] += 1
+            waited = time.monotonic() - start
+            self._waits.append(waited)
+            return waited
+
+    def release(self, service_seconds):
+        with self._cond:
+            self._active -= 1
+            a = 0.2 if self._service_ewma else 1.0
+            self._service_ewma += a * (service_seconds - self._service_ewma)
+            self._cond.notify()
+
+    def run(self, fn, *args, **kwargs):
+        """Call `fn` inside an admitted slot (raises Shed when not admitted)."""
+        self.acquire()
+        start = time.monotonic()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.release(time.monotonic() - start)
+
+    def metrics(self):
+        with self._cond:
+            waits = np.fromiter(self._waits, dtype=np.float64)
+            out = dict(self.counters)
+            out.update({
+                'active': self._active,
+                'waiting': self._waiting,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'queue_timeout_ms': round(self.queue_timeout * 1000, 1),
+                'service_time_ms': round(self._service_ewma * 1000, 2),
+            })
+        if len(waits):
+            p50, p99 = np.percentile(waits, [50, 99])
+            out['queue_wait_ms'] = {'p50': round(p50 * 1000, 2), 'p99': round(p99 * 1000, 2),
+                                    'max': round(waits.max() * 1000, 2), 'samples': len(waits)}
+        return out
+
+
+class ClientRateLimiter:
+    """Token bucket per client key: `rate` requests/second, bursts up to `burst`.
+
+    Buckets of the least recently seen clients are dropped beyond
+    `max_clients`, so memory stays bounded under many distinct callers.
+    """
+
+    def __init__(self, rate, burst, max_clients=10000):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # key -> [tokens, last_refill]
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def allow(self, key):
+        """Spend one token for `key`; returns (allowed, seconds_until_next_token)."""
+        if self.rate <= 0:
+            return True, 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return True, 0.0
+            self.limited += 1
+            return False, (1.0 - bucket[0]) / self.rate
+
+    def metrics(self):
+        with self._lock:
+            return {'rate_limited': self.limited, 'tracked_clients': len(self._buckets),
+                    'rate_per_second': self.rate, 'burst': self.burst}
@@ -0,0 +1,135 @@
+"""Exact per-feature attributions for tree-ensemble predictions.
+
+A tree's class probabilities at a leaf equal those at the root plus the
+change at every split on the way down; crediting each change to the feature
+split on gives contributions that sum exactly to the prediction (tree-path
+attribution). For a forest these are averaged over trees, matching
+`predict_proba`.
+
+`TreeAttribution` flattens every tree into one node table when a model is
+loaded. Explaining a batch then walks all rows through all trees together,
+one tree level per numpy step, whatever the batch size.
+`AttributionCache` keeps recent results per model version and feature row,
+so repeated inputs skip the model entirely.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class TreeAttribution:
+    """Precomputed path contributions of a fitted sklearn tree classifier or forest."""
+
+    def __init__(self, model):
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None:
+            estimators = [model]
+        if not estimators or not all(hasattr(e, 'tree_') for e in estimators):
+            raise TypeError('attributions need a decision tree or random forest classifier')
+        self.classes = np.asarray(model.classes_)
+        self.n_features = int(model.n_features_in_)
+        k = len(self.classes)
+
+        # All trees flattened into one node table; leaves point at themselves
+        # with an always-true split, so walking past a leaf adds nothing.
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset, depth = 0, 0
+        for est in estimators:
+            tree = est.tree_
+            leaf = tree.children_left < 0
+            nodes = np.arange(tree.node_count) + offset
+            v = tree.value[:, 0, :k].astype(np.float64)
+            value.append(v / np.maximum(v.sum(axis=1, keepdims=True), 1e-12))
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(np.where(leaf, np.inf, tree.threshold))
+            left.append(np.where(leaf, nodes, tree.children_left + offset))
+            right.append(np.where(leaf, nodes, tree.children_right + offset))
+            roots.append(offset)
+            offset += tree.node_count
+            depth = max(depth, tree.max_depth)
+        self._feature = np.concatenate(feature).astype(np.intp)
+        self._threshold = np.concatenate(threshold)
+        self._left = np.concatenate(left).astype(np.intp)
+        self._right = np.concatenate(right).astype(np.intp)
+        self._value = np.concatenate(value)
+        self._roots = np.array(roots, dtype=np.intp)
+        self._depth = depth
+        self.bias = self._value[self._roots].mean(axis=0)
+
+    def explain(self, X):
+        """`(probabilities, contributions)` for the rows of `X`.
+
+        `contributions[i, f, c]` is feature f's share of row i's probability
+        of class c; `bias + contributions[i].sum(axis=0) == probabilities[i]`.
+        All rows walk all trees together, one tree level per step.
+        """
+        # Trees compare float32 inputs, as sklearn's predict does
+        X = np.asarray(X, dtype=np.float32)
+        n, k, n_trees = len(X), len(self.classes), len(self._roots)
+        rows = np.repeat(np.arange(n), n_trees)
+        node = np.tile(self._roots, n)
+        contrib = np.zeros((k, n * self.n_features))
+        for _ in range(self._depth):
+            f = self._feature[node]
+            child = np.where(X[rows, f] <= self._threshold[node], self._left[node], self._right[node])
+            delta = self._value[child] - self._value[node]
+            slot = rows * self.n_features + f
+            for c in range(k):
+                contrib[c] += np.bincount(slot, weights=delta[:, c], minlength=n * self.n_features)
+            node = child
+        contrib = (contrib / n_trees).T.reshape(n, self.n_features, k)
+        return self.bias + contrib.sum(axis=1), contrib
+
+
+class AttributionCache:
+    """LRU of `(probabilities, contributions)` keyed by model version and feature row."""
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def explain(self, attribution, version, X):
+        """Explain the rows of `X`, computing only rows not seen for `version`.
+
+        Returns `(probabilities, contributions)` arrays for all rows.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        keys = [(version, row.tobytes()) for row in X]
+        found = [None] * len(keys)
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    found[i] = entry
+        missing = [i for i, entry in enumerate(found) if entry is None]
+        if missing:
+            # Duplicates within a batch are computed once
+            first = {}
+            for i in missing:
+                first.setdefault(keys[i], i)
+            unique = list(first)
+            index = {key: j for j, key in enumerate(unique)}
+            probs, contrib = attribution.explain(X[list(first.values())])
+            computed = [(probs[j], contrib[j]) for j in range(len(unique))]
+            for i in missing:
+                found[i] = computed[index[keys[i]]]
+            with self._lock:
+                for key, entry in zip(unique, computed):
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return np.vstack([p for p, _ in found]), np.stack([c for _, c in found])
+
+    def stats(self):
+        """Entry count and hit/miss totals, for the admin status endpoint."""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,62 @@
+"""Code -> label lookups compiled from the dataset data guide.
+
+`scripts/compile_codes.py` turns dataset-data-guide.xlsx into codes.json;
+`CodeBook` loads that once and answers lookups with two dict accesses.
+Codes are matched in canonical string form, so 1, 1.0, "1" and "1.0" all
+find the label for code "1".
+"""
+import hashlib
+import json
+
+
+def code_key(code):
+    """Canonical string form of a code as stored in codes.json."""
+    if isinstance(code, float) and code.is_integer():
+        return str(int(code))
+    key = str(code).strip()
+    if key.endswith('.0') and key[:-2].lstrip('-').isdigit():
+        return key[:-2]
+    return key
+
+
+class CodeBook:
+    """Read-only code lists keyed by dataset field name."""
+
+    def __init__(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.fields = data.get('fields', {})
+        self.tables = data.get('tables', {})
+        self.version = (data.get('source_sha1') or '')[:12]
+        # Pre-serialized bodies for /api/codes, built on first use
+        self._bodies = {}
+
+    def label(self, field, code):
+        """Label for `code` of `field`, or None when either is unknown."""
+        codes = self.fields.get(field)
+        if codes is None or code is None:
+            return None
+        return codes.get(code_key(code))
+
+    def annotate(self, items, code_field, field, out='label'):
+        """Add `out` = label to each dict in `items` whose `code_field` is a known code."""
+        codes = self.fields.get(field, {})
+        for item in items or []:
+            if isinstance(item, dict) and item.get(code_field) is not None:
+                label = codes.get(code_key(item[code_field]))
+                if label is not None:
+                    item[out] = label
+        return items
+
+    def body(self, fields=None):
+        """`(json_bytes, etag)` of the selected fields (all when None)."""
+        key = tuple(fields) if fields else None
+        cached = self._bodies.get(key)
+        if cached is None:
+            selected = self.fields if fields is None else {f: self.fields[f] for f in fields}
+            body = json.dumps({'version': self.version, 'fields': selected},
+                              separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+            cached = (body, hashlib.sha1(body).hexdigest()[:16])
+            if len(self._bodies) < 256:
+                self._bodies[key] = cached
+        return cached
@@ -0,0 +1,382 @@
+"""Packed, memory-mapped copy of the datasets the API serves.
+
+`pack(data_dir)` (run by scripts/pack_dataplane.py after the pipeline)
+writes backend/data/dataplane.bin; `DataPlane` maps it read-only. Every
+worker maps the same file, so the data lives once in the page cache
+instead of once per process as parsed dicts and lists, and a new file is
+picked up by an atomic rename.
+
+File layout (all offsets relative to the data section, 64-byte aligned):
+
+  b'DSPLANE1' | u64 header length | header JSON | padding | data section
+
+The header lists three kinds of entries:
+  arrays   name -> [offset, dtype, shape]: numpy arrays, read as views
+  blobs    name -> [offset, length, etag]: bytes, mostly pre-serialized JSON
+  strings  name -> [offset, count, data_offset, data_length]: string tables,
+           int64 end offsets followed by the concatenated UTF-8 items
+
+Packed datasets (header `meta.datasets` maps each to its source files):
+  summary                     accidents_summary.json (blob, `null` if missing)
+  hotspots.head, hotspots.features
+                              the hotspot GeoJSON without its features (blob)
+                              and one compact Feature per entry (strings)
+  hotspots.lat/lng/count      hotspot cells (arrays)
+  report/<file>               each backend/data/reports/*.json (blobs)
+  heatmap.lat/lng/indptr/indices/counts, heatmap.frames
+                              heatmap_slices.npz (arrays) and the 168 encoded
+                              hourly frames (strings)
+  tiles.x/y/weight            tile renderer points, projected and sorted
+  route.lat/lng/weight        route-risk cell weights
+  mapdata                     /api/mapdata response body (blob)
+
+A dataset whose source files changed after packing is not served from the
+plane until the next pack, so a partial pipeline run never serves stale data.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'DSPLANE1'
+ALIGN = 64
+FILENAME = 'dataplane.bin'
+HEATMAP_KEYS = ('lat', 'lng', 'indptr', 'indices', 'counts')
+
+
+def _compact(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _etag(body):
+    return hashlib.sha1(body).hexdigest()[:16]
+
+
+def encode_heatmap_frame(arrays, slot):
+    """Compact JSON bytes for one heatmap slice: `{day, hour, lat[], lng[], count[]}`."""
+    lo, hi = int(arrays['indptr'][slot]), int(arrays['indptr'][slot + 1])
+    cells = arrays['indices'][lo:hi]
+    return json.dumps({
+        'day': slot // 24 + 1,
+        'hour': slot % 24,
+        'lat': arrays['lat'][cells].tolist(),
+        'lng': arrays['lng'][cells].tolist(),
+        'count': arrays['counts'][lo:hi].tolist(),
+    }, separators=(',', ':')).encode('utf-8')
+
+
+def mapdata_payload(data):
+    """`{"api_key", "locations"}` extracted from the exported map widget state."""
+    api_key = None
+    locations = []
+    for v in data.get('state', {}).values():
+        if not isinstance(v, dict):
+            continue
+        model_name = v.get('model_name')
+        s = v.get('state', {})
+        if model_name == 'PlainmapModel':
+            cfg = s.get('configuration', {})
+            if cfg.get('api_key'):
+                api_key = cfg.get('api_key')
+        if model_name == 'SimpleHeatmapLayerModel':
+            for pair in s.get('locations', []):
+                if isinstance(pair, list) and len(pair) >= 2:
+                    locations.append({'lat': float(pair[0]), 'lng': float(pair[1])})
+    return {'api_key': api_key, 'locations': locations}
+
+
+class StringTable:
+    """Read-only sequence of byte strings backed by the mapped file."""
+
+    def __init__(self, ends, data):
+        self._ends = ends
+        self._data = data
+
+    def __len__(self):
+        return len(self._ends)
+
+    @property
+    def nbytes(self):
+        """Total length of all items."""
+        return len(self._data)
+
+    def __getitem__(self, i):
+        """Item `i` as a memoryview into the file (no copy)."""
+        if not -len(self._ends) <= i < len(self._ends):
+            raise IndexError(i)
+        i %= len(self._ends)
+        lo = int(self._ends[i - 1]) if i else 0
+        return self._data[lo:int(self._ends[i])]
+
+    def get(self, i, default=None):
+        try:
+            return self[i]
+        except IndexError:
+            return default
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class DataPlane:
+    """Read-only view of a packed data plane file.
+
+    Arrays, blobs and string items are views into one shared mmap; nothing
+    is parsed or copied beyond the small header. The mapping stays valid
+    after the file is replaced, until the last view is released.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mm)
+        if bytes(view[:8]) != MAGIC:
+            raise ValueError('not a data plane file: ' + path)
+        (header_len,) = struct.unpack_from('<Q', view, 8)
+        header = json.loads(bytes(view[16:16 + header_len]).decode('utf-8'))
+        base = _aligned(16 + header_len)
+        self.path = path
+        self.stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+        self.version = header['version']
+        self.meta = header.get('meta', {})
+        self._datasets = self.meta.get('datasets', {})
+        self._files = self.meta.get('files', {})
+        self._data = view[base:]
+        self._arrays = header.get('arrays', {})
+        self._blobs = header.get('blobs', {})
+        self._strings = header.get('strings', {})
+
+    def array(self, name):
+        """Read-only numpy view of array `name`, or None."""
+        spec = self._arrays.get(name)
+        if spec is None:
+            return None
+        offset, dtype, shape = spec
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape)) if shape else 1
+        return np.frombuffer(self._data, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+    def blob(self, name):
+        """`(memoryview, etag)` of blob `name`, or `(None, None)`."""
+        spec = self._blobs.get(name)
+        if spec is None:
+            return None, None
+        offset, length, etag = spec
+        return self._data[offset:offset + length], etag
+
+    def strings(self, name):
+        """StringTable `name`, or None."""
+        spec = self._strings.get(name)
+        if spec is None:
+            return None
+        offset, count, data_offset, data_length = spec
+        ends = np.frombuffer(self._data, dtype='<i8', count=count, offset=offset)
+        return StringTable(ends, self._data[data_offset:data_offset + data_length])
+
+    def has(self, name):
+        return name in self._arrays or name in self._blobs or name in self._strings
+
+    def current(self, dataset, data_dir):
+        """True when `dataset` was packed and its source files in `data_dir`
+        are unchanged since; otherwise callers read the files themselves.
+        """
+        names = self._datasets.get(dataset)
+        if names is None:
+            return False
+        return all(_file_stat(os.path.join(data_dir, name)) == self._files.get(name) for name in names)
+
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+class DataPlaneWriter:
+    """Collects arrays, blobs and string tables and writes them as one file."""
+
+    def __init__(self):
+        self.meta = {}
+        self._parts = []  # (kind, name, payload)
+
+    def add_array(self, name, array):
+        array = np.ascontiguousarray(array)
+        if array.dtype.byteorder == '>':
+            array = array.astype(array.dtype.newbyteorder('<'))
+        self._parts.append(('array', name, array))
+
+    def add_blob(self, name, body):
+        self._parts.append(('blob', name, bytes(body)))
+
+    def add_json(self, name, data):
+        self.add_blob(name, _compact(data))
+
+    def add_strings(self, name, items):
+        items = [s.encode('utf-8') if isinstance(s, str) else bytes(s) for s in items]
+        ends = np.cumsum([len(s) for s in items], dtype='<i8') if items else np.zeros(0, dtype='<i8')
+        self._parts.append(('strings', name, (ends, b''.join(items))))
+
+    def write(self, path):
+        """Write to `path` atomically (temp file + rename); returns the version."""
+        chunks = []  # (offset, bytes-like), relative to the data section
+        pos = 0
+        header = {'arrays': {}, 'blobs': {}, 'strings': {}}
+        digest = hashlib.sha1()
+
+        def place(data):
+            nonlocal pos
+            pos = _aligned(pos)
+            offset = pos
+            chunks.append((offset, data))
+            digest.update(data)
+            pos += len(data)
+            return offset
+
+        for kind, name, payload in self._parts:
+            if kind == 'array':
+                offset = place(payload.tobytes())
+                header['arrays'][name] = [offset, payload.dtype.str, list(payload.shape)]
+            elif kind == 'blob':
+                offset = place(payload)
+                header['blobs'][name] = [offset, len(payload), _etag(payload)]
+            else:
+                ends, data = payload
+                offset = place(ends.tobytes())
+                data_offset = place(data)
+                header['strings'][name] = [offset, len(ends), data_offset, len(data)]
+        header['version'] = digest.hexdigest()[:12]
+        header['meta'] = self.meta
+        head = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        base = _aligned(16 + len(head))
+
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC + struct.pack('<Q', len(head)) + head)
+            f.write(b'\0' * (base - 16 - len(head)))
+            written = 0
+            for offset, data in chunks:
+                f.write(b'\0' * (offset - written))
+                f.write(data)
+                written = offset + len(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return header['version']
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _file_stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def pack(data_dir, out_path=None):
+    """Pack the pipeline outputs in `data_dir` into a data plane file.
+
+    Returns `(version, out_path)`. Datasets whose source files are missing
+    are left out; the header records each dataset's source files with
+    their mtime and size (see `DataPlane.current`).
+    """
+    from heatmap_tiles import load_points, mercator_world, source_version
+    from route_risk import HotspotIndex
+    out_path = out_path or os.path.join(data_dir, FILENAME)
+    w = DataPlaneWriter()
+    files, datasets = {}, {}
+
+    def sources(dataset, *names):
+        # Stat before reading, so a file replaced mid-pack reads as changed
+        for name in names:
+            files[name] = _file_stat(os.path.join(data_dir, name))
+        datasets[dataset] = list(names)
+
+    sources('summary', 'accidents_summary.json')
+    w.add_json('summary', _read_json(os.path.join(data_dir, 'accidents_summary.json')))
+
+    name = 'accidents_hotspots.geojson'
+    sources('hotspots', name)
+    hotspots = _read_json(os.path.join(data_dir, name))
+    if isinstance(hotspots, dict):
+        features = hotspots.pop('features', None) or []
+        w.add_json('hotspots.head', hotspots)
+        w.add_strings('hotspots.features', [_compact(f) for f in features])
+        coords = np.array([f['geometry']['coordinates'][:2] for f in features], dtype=np.float64).reshape(-1, 2)
+        w.add_array('hotspots.lat', coords[:, 1])
+        w.add_array('hotspots.lng', coords[:, 0])
+        w.add_array('hotspots.count', np.array([f['properties'].get('count', 0) for f in features],
+                                               dtype=np.float64))
+    else:
+        del datasets['hotspots']
+
+    reports_dir = os.path.join(data_dir, 'reports')
+    names = sorted(n for n in os.listdir(reports_dir) if n.endswith('.json')) if os.path.isdir(reports_dir) else []
+    for name in names:
+        sources('report/' + name, 'reports/' + name)
+        report = _read_json(os.path.join(reports_dir, name))
+        if report:
+            w.add_json('report/' + name, report)
+        else:
+            del datasets['report/' + name]
+
+    name = 'heatmap_slices.npz'
+    if os.path.exists(os.path.join(data_dir, name)):
+        sources('heatmap', name)
+        with np.load(os.path.join(data_dir, name)) as npz:
+            arrays = {k: npz[k] for k in HEATMAP_KEYS}
+        arrays['lat'] = np.round(arrays['lat'].astype(np.float64), 3)
+        arrays['lng'] = np.round(arrays['lng'].astype(np.float64), 3)
+        for k in HEATMAP_KEYS:
+            w.add_array('heatmap.' + k, arrays[k])
+        w.add_strings('heatmap.frames', [encode_heatmap_frame(arrays, slot)
+                                         for slot in range(len(arrays['indptr']) - 1)])
+
+    tile_sources = [n for n in ('heatmap_slices.npz', 'accidents_hotspots.geojson')
+                    if os.path.exists(os.path.join(data_dir, n))]
+    if tile_sources:
+        sources('tiles', tile_sources[0])
+        points = load_points(data_dir)
+        if points:
+            lat, lng, weight, source = points
+            x, y = mercator_world(lat, lng)
+            order = np.argsort(x, kind='stable')
+            w.add_array('tiles.x', x[order])
+            w.add_array('tiles.y', y[order])
+            w.add_array('tiles.weight', np.asarray(weight, dtype=np.float64)[order])
+            # Same version as a renderer built from the source file, so tiles
+            # pre-rendered by scripts/prerender_tiles.py stay valid
+            w.meta['tiles_version'] = source_version(source)
+        else:
+            del datasets['tiles']
+
+    sources('route', 'accidents_hotspots.geojson', 'reports/hotspot_analysis_report.json')
+    index = HotspotIndex.from_data_dir(data_dir)
+    if index is not None:
+        w.add_array('route.lat', index.lat)
+        w.add_array('route.lng', index.lng)
+        w.add_array('route.weight', index.weight)
+    else:
+        del datasets['route']
+
+    name = 'mapdata.json'
+    sources('mapdata', name)
+    mapdata = _read_json(os.path.join(data_dir, name))
+    if mapdata:
+        w.add_json('mapdata', mapdata_payload(mapdata))
+    else:
+        del datasets['mapdata']
+
+    w.meta['files'] = {n: files[n] for n in sorted({n for names in datasets.values() for n in names})}
+    w.meta['datasets'] = datasets
+    return w.write(out_path), out_path
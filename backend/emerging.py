@@ -0,0 +1,136 @@
+"""Emerging-hotspot detection on the month x cell matrix (monthly_cells.npz).
+
+For each location cell the recent window (last `recent` months) is compared
+with a baseline window (the `baseline` months before it). Under the null
+hypothesis a cell follows the network-wide trend, so given its total
+n = recent + baseline, its recent count is Binomial(n, p0) with p0 the
+network share of incidents in the recent window (the exact conditional test
+for two Poisson rates). One-sided p-values are corrected for the number of
+cells tested with Benjamini-Hochberg.
+
+Each cell also gets a Getis-Ord Gi* z-score of its excess (recent minus
+expected under the network trend) over the cells within `radius_m`; high
+values mark increases concentrated around a junction or along a corridor.
+Everything is array arithmetic over all cells at once.
+"""
+import numpy as np
+
+RADIUS_M = 300.0
+M_PER_DEG_LAT = 110540.0
+M_PER_DEG_LNG = 111320.0
+
+
+class MonthCellCounts:
+    """CSR month x cell counts: row i is month `start + i`."""
+
+    def __init__(self, path):
+        with np.load(path) as npz:
+            self.start = npz['start'].astype('datetime64[M]')
+            self.lat = np.round(npz['lat'].astype(np.float64), 3)
+            self.lng = np.round(npz['lng'].astype(np.float64), 3)
+            self.indptr = npz['indptr']
+            self.indices = npz['indices']
+            self.counts = npz['counts']
+        self.n_months = len(self.indptr) - 1
+        self.n_cells = len(self.lat)
+
+    def month(self, row):
+        return str(self.start + row)
+
+    def window(self, first, stop):
+        """Per-cell totals over months [first, stop) as a float array."""
+        lo, hi = self.indptr[first], self.indptr[stop]
+        return np.bincount(self.indices[lo:hi], weights=self.counts[lo:hi], minlength=self.n_cells)
+
+
+def benjamini_hochberg(p):
+    """Benjamini-Hochberg adjusted p-values (q-values), same order as `p`."""
+    m = len(p)
+    if not m:
+        return p
+    order = np.argsort(p)
+    ranked = p[order] * m / np.arange(1, m + 1)
+    q = np.empty(m)
+    q[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+    return q
+
+
+def getis_ord_gi_star(lat, lng, x, radius_m=RADIUS_M):
+    """Gi* z-scores of `x` with binary weights within `radius_m` (self included)."""
+    from scipy.spatial import cKDTree
+    n = len(x)
+    if n < 2:
+        return np.zeros(n)
+    lat0 = np.radians(np.mean(lat))
+    pts = np.column_stack([lng * M_PER_DEG_LNG * np.cos(lat0), lat * M_PER_DEG_LAT])
+    pairs = cKDTree(pts).query_pairs(radius_m, output_type='ndarray')
+    i, j = pairs[:, 0], pairs[:, 1]
+    lag = x + np.bincount(i, weights=x[j], minlength=n) + np.bincount(j, weights=x[i], minlength=n)
+    w = 1.0 + np.bincount(i, minlength=n) + np.bincount(j, minlength=n)
+    mean = x.mean()
+    s = np.sqrt(max((x ** 2).mean() - mean ** 2, 0.0))
+    denom = s * np.sqrt(np.maximum(n * w - w ** 2, 0.0) / (n - 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (lag - mean * w) / denom
+    return np.where(denom > 0, z, 0.0)
+
+
+def detect(data, recent=3, baseline=None, alpha=0.05, min_recent=3, radius_m=RADIUS_M, limit=100):
+    """Flag cells whose recent count rose significantly faster than the network.
+
+    `baseline` defaults to every month before the recent window. Returns a
+    JSON-ready dict with the windows, totals and the `limit` most
+    significant emerging cells.
+    """
+    from scipy.stats import binom
+    n = data.n_months
+    if n < 2:
+        raise ValueError('need at least two months of data')
+    recent = min(max(int(recent), 1), n - 1)
+    baseline = n - recent if baseline is None else min(max(int(baseline), 1), n - recent)
+    r_lo, b_lo = n - recent, n - recent - baseline
+    r = data.window(r_lo, n)
+    b = data.window(b_lo, r_lo)
+    total_r, total_b = r.sum(), b.sum()
+    if total_r == 0 or total_b == 0:
+        raise ValueError('a window has no incidents')
+    p0 = total_r / (total_r + total_b)
+    expected = b * total_r / total_b
+
+    # Every cell with enough incidents to reach significance is tested, in
+    # either direction, so the FDR correction is not biased by selection
+    tested = np.flatnonzero(r + b >= min_recent)
+    p = binom.sf(r[tested] - 1, r[tested] + b[tested], p0)
+    q = benjamini_hochberg(p)
+
+    active = np.flatnonzero(r + b > 0)
+    gi = np.zeros(data.n_cells)
+    gi[active] = getis_ord_gi_star(data.lat[active], data.lng[active], r[active] - (r + b)[active] * p0, radius_m)
+
+    hits = np.flatnonzero((q < alpha) & (r[tested] >= min_recent))
+    hits = hits[np.lexsort((-r[tested[hits]], p[hits]))]
+    cells = tested[hits[:limit]]
+    emerging = []
+    for k, c in zip(hits[:limit].tolist(), cells.tolist()):
+        emerging.append({
+            'location': '{},{}'.format(data.lat[c], data.lng[c]),
+            'lat': float(data.lat[c]),
+            'lng': float(data.lng[c]),
+            'recent_incidents': int(r[c]),
+            'baseline_incidents': int(b[c]),
+            'expected_recent': round(float(expected[c]), 2),
+            'rate_ratio': round(float((r[c] + 0.5) / (expected[c] + 0.5)), 2),
+            'p_value': float(p[k]),
+            'q_value': float(q[k]),
+            'gi_star_z': round(float(gi[c]), 2),
+        })
+    return {
+        'parameters': {'recent_months': recent, 'baseline_months': baseline, 'alpha': alpha,
+                       'min_recent': min_recent, 'radius_m': radius_m},
+        'recent_window': {'from': data.month(r_lo), 'to': data.month(n - 1), 'incidents': int(total_r)},
+        'baseline_window': {'from': data.month(b_lo), 'to': data.month(r_lo - 1), 'incidents': int(total_b)},
+        'cells_active': int(len(active)),
+        'cells_tested': int(len(tested)),
+        'emerging_count': int(len(hits)),
+        'emerging_hotspots': emerging,
+    }
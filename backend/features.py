@@ -0,0 +1,144 @@
+"""Feature layout shared by the API and the offline scripts.
+
+The model takes 11 numeric inputs in the order of FEATURE_NAMES.
+`map_frontend_to_model_features` builds one row from a frontend payload;
+`frame_to_model_features` builds many rows at once from accident/vehicle
+dataset columns with the same defaults; `sweep_matrix` builds a grid of
+payload variations for what-if sweeps.
+"""
+import numpy as np
+
+# Model input order (payload key used by /api/predict)
+FEATURE_NAMES = [
+    'Did_Police_Officer_Attend', 'age_of_driver', 'vehicle_type', 'age_of_vehicle',
+    'engine_cc', 'day', 'weather', 'roadsc', 'light', 'gender', 'speedl',
+]
+
+# Fallbacks used when a payload key or dataset value is missing
+FEATURE_DEFAULTS = {
+    'Did_Police_Officer_Attend': 0.0,
+    'age_of_driver': 30.0,
+    'vehicle_type': 3.0,
+    'age_of_vehicle': 5.0,
+    'engine_cc': 1500.0,
+    'day': 1.0,
+    'weather': 1.0,
+    'roadsc': 1.0,
+    'light': 1.0,
+    'gender': 1.0,
+    'speedl': 40.0,
+}
+
+# Dataset column (accidents joined with vehicles) feeding each feature
+DATASET_COLUMNS = {
+    'Did_Police_Officer_Attend': 'did_police_officer_attend_scene_of_accident',
+    'age_of_driver': 'age_of_driver',
+    'vehicle_type': 'vehicle_type',
+    'age_of_vehicle': 'age_of_vehicle',
+    'engine_cc': 'engine_capacity_cc',
+    'day': 'day_of_week',
+    'weather': 'weather_conditions',
+    'roadsc': 'road_surface_conditions',
+    'light': 'light_conditions',
+    'gender': 'sex_of_driver',
+    'speedl': 'speed_limit',
+}
+
+VEHICLE_MAP = {'car': 3, 'bike': 2, 'truck': 4, 'bus': 5}
+WEATHER_MAP = {'clear': 1, 'rain': 2, 'fog': 3, 'snow': 4}
+
+# Payload keys that set a feature under another name
+PAYLOAD_ALIASES = {'vehicle': 'vehicle_type'}
+
+
+def map_frontend_to_model_features(payload: dict):
+    """Map frontend payload to numeric feature vector expected by the model.
+
+    This function keeps a small, robust mapping and provides defaults so the
+    API remains usable during frontend/back-end iteration.
+    """
+    # Read values with sensible fallbacks
+    Did_Police_Officer_Attend = float(payload.get('Did_Police_Officer_Attend', 0))
+    age_of_driver = float(payload.get('age_of_driver', 30.0))
+    try:
+        vehicle_type = float(payload.get('vehicle_type'))
+    except Exception:
+        vehicle_type = VEHICLE_MAP.get(payload.get('vehicle', '').lower(), 3)
+
+    age_of_vehicle = float(payload.get('age_of_vehicle', 5.0))
+    engine_cc = float(payload.get('engine_cc', 1500.0))
+    day = int(float(payload.get('day', 1)))
+    try:
+        weather_n = int(float(payload.get('weather', 1)))
+    except Exception:
+        weather_n = WEATHER_MAP.get(str(payload.get('weather', '')).lower(), 1)
+    roadsc = int(float(payload.get('roadsc', 1)))
+    light = int(float(payload.get('light', 1)))
+    gender = int(float(payload.get('gender', 1)))
+    speedl = float(payload.get('speedl', 40.0))
+
+    arr = np.array([Did_Police_Officer_Attend, age_of_driver, vehicle_type, age_of_vehicle,
+                    engine_cc, day, weather_n, roadsc, light, gender, speedl])
+    return arr.astype(float).reshape(1, -1)
+
+
+def frame_to_model_features(df, log_ages=True):
+    """Vectorized equivalent of `map_frontend_to_model_features` for a DataFrame.
+
+    `df` holds the DATASET_COLUMNS; absent columns and missing values
+    (NaN or the dataset's negative "unknown" codes) take FEATURE_DEFAULTS.
+    Integer-coded features are truncated like the per-payload mapping. With
+    `log_ages` the driver/vehicle ages are log-transformed, as the frontend
+    does before calling /api/predict.
+    Returns a float64 array of shape (len(df), 11).
+    """
+    import pandas as pd
+    out = np.empty((len(df), len(FEATURE_NAMES)), dtype=np.float64)
+    for i, name in enumerate(FEATURE_NAMES):
+        default = FEATURE_DEFAULTS[name]
+        col = DATASET_COLUMNS[name]
+        if col not in df.columns:
+            out[:, i] = default
+            continue
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        values = np.where(np.isnan(values) | (values < 0), default, values)
+        if name in ('day', 'weather', 'roadsc', 'light', 'gender'):
+            values = np.trunc(values)
+        out[:, i] = values
+    if log_ages:
+        for name in ('age_of_driver', 'age_of_vehicle'):
+            i = FEATURE_NAMES.index(name)
+            out[:, i] = np.log(np.maximum(out[:, i], 1.0))
+    return out
+
+
+def sweep_matrix(base, axes):
+    """Feature matrix for every combination of the swept payload values.
+
+    `base` is a frontend payload; `axes` is a list of `(payload_key, values)`
+    (a FEATURE_NAMES key or an alias such as `vehicle`). Each value is mapped
+    through `map_frontend_to_model_features` once, so sweeps use exactly the
+    same coercions and defaults as /api/predict; the grid itself is built by
+    broadcasting. Rows are in C order over the axes (the last axis varies
+    fastest). Returns `(matrix, shape)`; raises ValueError for unknown or
+    repeated features.
+    """
+    base_row = map_frontend_to_model_features(base)[0]
+    columns = []
+    for key, values in axes:
+        feature = PAYLOAD_ALIASES.get(key, key)
+        if feature not in FEATURE_NAMES:
+            raise ValueError('unknown feature: {}'.format(key))
+        i = FEATURE_NAMES.index(feature)
+        if i in [c for c, _ in columns]:
+            raise ValueError('feature swept twice: {}'.format(feature))
+        payload = dict(base)
+        if key != feature:
+            payload.pop(feature, None)  # the alias only applies when the feature itself is absent
+        column = np.array([map_frontend_to_model_features(dict(payload, **{key: v}))[0, i] for v in values])
+        columns.append((i, column))
+    shape = tuple(len(c) for _, c in columns)
+    matrix = np.tile(base_row, (int(np.prod(shape)), 1))
+    for (i, _), grid in zip(columns, np.meshgrid(*[c for _, c in columns], indexing='ij')):
+        matrix[:, i] = grid.ravel()
+    return matrix, shape
@@ -0,0 +1,278 @@
+"""Server-side heatmap tiles (Web Mercator, 256px PNG).
+
+Accident cells are projected once to world pixel coordinates and kept
+sorted by x. A tile is rendered by slicing the points that fall inside it
+(plus a kernel-sized margin), binning them with a 2D histogram, smoothing
+with a Gaussian kernel and mapping the log density through a colour ramp.
+The normalization is global, so neighbouring tiles line up without seams.
+Rendered tiles are cached in memory and on disk, both with LRU eviction.
+"""
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+TILE_SIZE = 256
+# Gaussian kernel width in screen pixels (constant across zoom levels)
+KERNEL_SIGMA_PX = 6.0
+MARGIN_PX = int(math.ceil(3 * KERNEL_SIGMA_PX))
+
+# Colour ramp stops: (position, r, g, b, a)
+RAMP = np.array([
+    (0.00, 0, 0, 255, 0),
+    (0.15, 0, 255, 255, 140),
+    (0.40, 0, 255, 0, 180),
+    (0.65, 255, 255, 0, 210),
+    (1.00, 255, 0, 0, 240),
+], dtype=np.float64)
+
+
+def encode_png(rgba):
+    """Encode an (h, w, 4) uint8 array as PNG bytes."""
+    h, w, _ = rgba.shape
+    raw = np.concatenate([np.zeros((h, 1), dtype=np.uint8), rgba.reshape(h, w * 4)], axis=1).tobytes()
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 6, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 6))
+            + chunk(b'IEND', b''))
+
+
+def _colorize(intensity):
+    """Map intensities in [0, 1] to RGBA through RAMP (vectorized)."""
+    out = np.empty(intensity.shape + (4,), dtype=np.uint8)
+    for c in range(4):
+        out[..., c] = np.interp(intensity, RAMP[:, 0], RAMP[:, c + 1]).astype(np.uint8)
+    out[intensity <= 0] = 0
+    return out
+
+
+def mercator_world(lat, lng):
+    """Project degrees to Web Mercator world coordinates in [0, 1)."""
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -85.05112878, 85.05112878)
+    x = (np.asarray(lng, dtype=np.float64) + 180.0) / 360.0
+    s = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + s) / (1 - s)) / (4 * math.pi)
+    return x, y
+
+
+class HeatmapTileRenderer:
+    """Renders density tiles for a fixed set of weighted points."""
+
+    def __init__(self, lat, lng, weight):
+        x, y = mercator_world(lat, lng)
+        order = np.argsort(x, kind='stable')
+        self._setup(x[order], y[order], np.asarray(weight, dtype=np.float64)[order])
+
+    @classmethod
+    def from_projected(cls, x, y, weight):
+        """Renderer over points already in world coordinates and sorted by x.
+
+        The arrays are used as given (e.g. read-only views of the data plane).
+        """
+        renderer = cls.__new__(cls)
+        renderer._setup(x, y, weight)
+        return renderer
+
+    def _setup(self, x, y, weight):
+        self.x, self.y, self.weight = x, y, weight
+        # Global reference: the heaviest cell under the kernel's peak
+        self.ref = float(np.log1p(self.weight.max() / (2 * math.pi * KERNEL_SIGMA_PX ** 2))) if len(self.weight) else 1.0
+        self._empty = None
+
+    def empty_tile(self):
+        if self._empty is None:
+            self._empty = encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+        return self._empty
+
+    def render(self, z, x, y):
+        """Return PNG bytes for tile (z, x, y); x wraps around the antimeridian."""
+        from scipy.ndimage import gaussian_filter
+        n = 1 << z
+        x %= n
+        scale = n * TILE_SIZE
+        size = TILE_SIZE + 2 * MARGIN_PX
+        x0 = (x * TILE_SIZE - MARGIN_PX) / scale
+        y0 = (y * TILE_SIZE - MARGIN_PX) / scale
+        x1, y1 = x0 + size / scale, y0 + size / scale
+        lo, hi = np.searchsorted(self.x, [x0, x1])
+        ys = self.y[lo:hi]
+        keep = (ys >= y0) & (ys < y1)
+        if not keep.any():
+            return self.empty_tile()
+        px = (self.x[lo:hi][keep] - x0) * scale
+        py = (ys[keep] - y0) * scale
+        grid, _, _ = np.histogram2d(py, px, bins=size, range=[[0, size], [0, size]],
+                                    weights=self.weight[lo:hi][keep])
+        density = gaussian_filter(grid, KERNEL_SIGMA_PX, mode='constant', truncate=3.0)
+        density = density[MARGIN_PX:MARGIN_PX + TILE_SIZE, MARGIN_PX:MARGIN_PX + TILE_SIZE]
+        intensity = np.clip(np.log1p(density) / self.ref, 0.0, 1.0)
+        intensity[density < 1e-3] = 0.0
+        return encode_png(_colorize(intensity))
+
+
+class TileCache:
+    """Two-level LRU cache of tile bytes: memory (by count) and disk (by bytes).
+
+    The disk directory may be shared with other processes (server workers,
+    scripts/prerender_tiles.py): tiles they wrote are picked up on an index
+    miss, and the index is rebuilt from the directory at most every
+    `rescan_seconds` when writing, so the byte cap holds for the directory
+    as a whole rather than per process.
+    """
+
+    def __init__(self, disk_dir, max_memory_tiles=2048, max_disk_bytes=256 << 20, rescan_seconds=60.0):
+        self.disk_dir = disk_dir
+        self.max_memory_tiles = max_memory_tiles
+        self.max_disk_bytes = max_disk_bytes
+        self.rescan_seconds = rescan_seconds
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()  # relative path -> size, oldest first
+        self._disk_bytes = 0
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+        self._scan_disk()
+
+    def _scan_disk(self):
+        """Rebuild the disk index from the directory, oldest files first."""
+        entries = []
+        if os.path.isdir(self.disk_dir):
+            for root, _, files in os.walk(self.disk_dir):
+                for name in files:
+                    if name.endswith('.png'):
+                        path = os.path.join(root, name)
+                        try:
+                            st = os.stat(path)
+                        except OSError:
+                            continue  # evicted by another process meanwhile
+                        entries.append((st.st_mtime, os.path.relpath(path, self.disk_dir), st.st_size))
+        disk = OrderedDict((rel, size) for _, rel, size in sorted(entries))
+        with self._lock:
+            self._disk = disk
+            self._disk_bytes = sum(disk.values())
+            self._scanned_at = time.monotonic()
+
+    def get(self, key):
+        with self._lock:
+            body = self._memory.get(key)
+            if body is not None:
+                self._memory.move_to_end(key)
+                return body
+            rel = key + '.png'
+            known = rel in self._disk
+            if known:
+                self._disk.move_to_end(rel)
+        path = os.path.join(self.disk_dir, rel)
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+            os.utime(path)
+        except OSError:
+            if known:
+                with self._lock:
+                    self._disk_bytes -= self._disk.pop(rel, 0)
+            return None
+        if not known:
+            # Written by another process since the last scan
+            with self._lock:
+                if rel not in self._disk:
+                    self._disk[rel] = len(body)
+                    self._disk_bytes += len(body)
+        self._remember(key, body)
+        return body
+
+    def put(self, key, body, disk=True):
+        self._remember(key, body)
+        if not disk:
+            return
+        rel = key + '.png'
+        path = os.path.join(self.disk_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temp name: concurrent renders of one tile must not share it.
+        # Tiles are deterministic, so whichever replace lands last is fine.
+        fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        if time.monotonic() - self._scanned_at > self.rescan_seconds:
+            self._scan_disk()
+        evict = []
+        with self._lock:
+            self._disk_bytes += len(body) - self._disk.pop(rel, 0)
+            self._disk[rel] = len(body)
+            while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+                old, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                evict.append(old)
+        for old in evict:
+            try:
+                os.remove(os.path.join(self.disk_dir, old))
+            except OSError:
+                pass
+
+    def _remember(self, key, body):
+        with self._lock:
+            self._memory[key] = body
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_tiles:
+                self._memory.popitem(last=False)
+
+
+def source_version(path):
+    """Short version id of a points source file, used to namespace cached tiles."""
+    import hashlib
+    st = os.stat(path)
+    return hashlib.sha1('{}:{}:{}'.format(os.path.basename(path), st.st_mtime_ns, st.st_size).encode()).hexdigest()[:12]
+
+
+def tile_key(version, z, x, y):
+    return '{}/{}/{}/{}'.format(version, z, x, y)
+
+
+def tiles_covering(lat, lng, z):
+    """(x, y) of every tile at zoom `z` intersecting the points' bounding box."""
+    wx, wy = mercator_world([np.min(lat), np.max(lat)], [np.min(lng), np.max(lng)])
+    n = 1 << z
+    xs = range(max(int(wx[0] * n), 0), min(int(wx[1] * n), n - 1) + 1)
+    ys = range(max(int(wy[1] * n), 0), min(int(wy[0] * n), n - 1) + 1)
+    return [(x, y) for x in xs for y in ys]
+
+
+def load_points(data_dir):
+    """Accident locations and weights from the pipeline outputs.
+
+    Uses per-cell totals from heatmap_slices.npz (all accidents at 0.001
+    degree resolution); falls back to the hotspot GeoJSON. Returns
+    `(lat, lng, weight, source_path)` or None.
+    """
+    import json
+    path = os.path.join(data_dir, 'heatmap_slices.npz')
+    if os.path.exists(path):
+        with np.load(path) as npz:
+            weight = np.bincount(npz['indices'], weights=npz['counts'], minlength=len(npz['lat']))
+            return npz['lat'].astype(np.float64), npz['lng'].astype(np.float64), weight, path
+    path = os.path.join(data_dir, 'accidents_hotspots.geojson')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            features = json.load(f).get('features', [])
+    except Exception:
+        return None
+    coords = np.array([f['geometry']['coordinates'][:2] for f in features], dtype=np.float64).reshape(-1, 2)
+    weight = np.array([f['properties'].get('count', 1) for f in features], dtype=np.float64)
+    return coords[:, 1], coords[:, 0], weight, path
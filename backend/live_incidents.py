@@ -0,0 +1,357 @@
+"""Live incident ingestion: write-ahead log, incremental aggregates, push.
+
+`LiveAggregates` starts from the offline reports (severity distribution,
+monthly trends and per-force attendance) and the per-cell accident totals
+of the pipeline outputs, replays the write-ahead log, and then applies each
+new incident in O(1). Subscribers receive a delta with the new totals of
+every aggregate an incident touched.
+
+The WAL is shared by every worker process: appends happen under an
+exclusive file lock, and each process follows the file, so incidents
+ingested by one worker reach the aggregates and subscribers of all.
+"""
+import json
+import math
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locking (single-process use only)
+    fcntl = None
+
+SEVERITY_NAMES = {1: 'fatal', 2: 'severe', 3: 'slight'}
+
+
+def _cell(lat, lng):
+    return '{},{}'.format(round(lat, 3), round(lng, 3))
+
+
+def _cell_key(lat, lng):
+    """int64 key of the 0.001 degree cell(s) containing lat/lng (scalars or arrays)."""
+    lat_i = np.round(np.asarray(lat, dtype=np.float64) * 1000).astype(np.int64) + 90000
+    lng_i = np.round(np.asarray(lng, dtype=np.float64) * 1000).astype(np.int64) + 180000
+    return lat_i * 360001 + lng_i
+
+
+class _WalLock:
+    """Advisory lock on the WAL file shared by all processes appending to it."""
+
+    def __init__(self, f, exclusive):
+        self.f = f
+        self.mode = fcntl.LOCK_EX if (fcntl and exclusive) else (fcntl.LOCK_SH if fcntl else None)
+
+    def __enter__(self):
+        if self.mode is not None:
+            fcntl.flock(self.f.fileno(), self.mode)
+
+    def __exit__(self, *exc):
+        if self.mode is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+
+
+def _parse_date(value):
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(str(value), fmt)
+        except ValueError:
+            continue
+    raise ValueError('date must be YYYY-MM-DD or DD/MM/YYYY')
+
+
+def _parse_time(value):
+    if value in (None, ''):
+        return None
+    try:
+        if isinstance(value, str) and len(value) <= 5:
+            return datetime.strptime(value, '%H:%M').strftime('%H:%M')
+    except ValueError:
+        pass
+    raise ValueError('time must be HH:MM')
+
+
+def _integer(value, name, minimum=0):
+    """`value` as an int >= `minimum`; ValueError for anything else (incl. inf, nan, 2.5)."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = math.nan
+    if not math.isfinite(number) or number != int(number) or number < minimum:
+        raise ValueError('{} must be an integer >= {}'.format(name, minimum))
+    return int(number)
+
+
+def normalize_incident(record):
+    """Validate a posted accident record and return the fields we aggregate.
+
+    Required: `date`, `collision_severity` (1-3). Optional: `time` (HH:MM),
+    `latitude`, `longitude`, `number_of_casualties`, `police_force`,
+    `did_police_officer_attend_scene_of_accident` (1 = attended; other codes,
+    including the dataset's -1 for unknown, count as not attended). Counts
+    and codes must be finite integers. Raises ValueError.
+    """
+    if not isinstance(record, dict):
+        raise ValueError('each incident must be a JSON object')
+    date = _parse_date(record.get('date'))
+    severity = _integer(record.get('collision_severity'), 'collision_severity', minimum=1)
+    if severity not in SEVERITY_NAMES:
+        raise ValueError('collision_severity must be 1, 2 or 3')
+    out = {
+        'date': date.strftime('%Y-%m-%d'),
+        'time': _parse_time(record.get('time')),
+        'collision_severity': severity,
+        'number_of_casualties': _integer(record.get('number_of_casualties', 1) or 0, 'number_of_casualties'),
+        'police_force': None,
+        'did_police_officer_attend_scene_of_accident': None,
+        'latitude': None,
+        'longitude': None,
+    }
+    if record.get('police_force') not in (None, ''):
+        out['police_force'] = str(_integer(record['police_force'], 'police_force'))
+        attended = _integer(record.get('did_police_officer_attend_scene_of_accident', 0) or 0,
+                            'did_police_officer_attend_scene_of_accident', minimum=-1)
+        out['did_police_officer_attend_scene_of_accident'] = 1 if attended == 1 else 0
+    try:
+        lat, lng = float(record['latitude']), float(record['longitude'])
+        if -90 <= lat <= 90 and -180 <= lng <= 180 and (lat, lng) != (0, 0):
+            out['latitude'], out['longitude'] = lat, lng
+    except (KeyError, TypeError, ValueError):
+        pass
+    return out
+
+
+class LiveAggregates:
+    """In-memory report aggregates kept current by incremental updates.
+
+    `data_dir` holds the pipeline outputs used for per-cell baselines
+    (heatmap_slices.npz, else accidents_hotspots.geojson). With
+    `follow_seconds` > 0 a thread polls the WAL that often for incidents
+    appended by other processes.
+    """
+
+    def __init__(self, reports_dir, wal_path, fsync=False, data_dir=None, follow_seconds=0.5):
+        self.wal_path = wal_path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self.ingested = 0
+        self.severity = {}
+        self.months = {}
+        self.hotspots = {}  # cell -> incidents, for baseline leaders and touched cells
+        self.forces = {}
+        self._base_keys = np.empty(0, dtype=np.int64)  # sorted cell keys
+        self._base_counts = np.empty(0, dtype=np.int64)
+        self._seed(reports_dir)
+        if data_dir:
+            self._seed_cells(data_dir)
+        self._wal = open(wal_path, 'ab')
+        self._reader = open(wal_path, 'rb')
+        self._offset = 0
+        with _WalLock(self._wal, exclusive=True):
+            self._read_new()
+            # Terminate a line torn by a crash so the next append stays parseable
+            if os.fstat(self._wal.fileno()).st_size > self._offset:
+                self._wal.write(b'\n')
+                self._wal.flush()
+                self._offset = os.fstat(self._wal.fileno()).st_size
+        self.ingested = 0
+        if follow_seconds > 0:
+            threading.Thread(target=self._follow, args=(follow_seconds,), daemon=True,
+                             name='incident-wal-follower').start()
+
+    def _seed(self, reports_dir):
+        def load(name):
+            try:
+                with open(os.path.join(reports_dir, name), 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception:
+                return {}
+
+        # Older reports carry only the level name ('Serious' for code 2)
+        by_level = {'fatal': 'fatal', 'serious': 'severe', 'severe': 'severe', 'slight': 'slight'}
+        for d in load('severity_distribution.json').get('distribution', []):
+            name = SEVERITY_NAMES.get(d.get('code')) or by_level.get(str(d.get('severity_level', '')).lower())
+            if name:
+                self.severity[name] = int(d.get('count', 0))
+        for t in load('monthly_trends.json').get('trends', []):
+            sb = t.get('severity_breakdown', {})
+            self.months[t['month']] = {
+                'month': t['month'],
+                'incidents': int(t.get('incidents', 0)),
+                'casualties': int(t.get('casualties', 0)),
+                'severity_breakdown': {k: int(sb.get(k, 0)) for k in SEVERITY_NAMES.values()},
+            }
+        for h in load('hotspot_analysis_report.json').get('top_hotspots', []):
+            self.hotspots[_cell(h['lat'], h['lng'])] = int(h.get('incidents', 0))
+        police = load('emergency_response_metrics.json').get('police_response', {})
+        for p in police.get('by_police_force', []):
+            self.forces[str(p['force_id'])] = {'attended': int(p.get('attended', 0)),
+                                               'incidents': int(p.get('total_incidents', 0))}
+
+    def _seed_cells(self, data_dir, leaders=200):
+        """Historical incidents per cell, so a touched cell continues from its total.
+
+        All cells come from heatmap_slices.npz; older pipelines fall back to
+        the hotspot GeoJSON (top cells only). The `leaders` largest cells are
+        also entered into `hotspots` so they rank before being touched.
+        """
+        path = os.path.join(data_dir, 'heatmap_slices.npz')
+        try:
+            with np.load(path) as npz:
+                counts = np.bincount(npz['indices'], weights=npz['counts'], minlength=len(npz['lat']))
+                keys = _cell_key(npz['lat'], npz['lng'])
+        except Exception:
+            try:
+                with open(os.path.join(data_dir, 'accidents_hotspots.geojson'), 'r', encoding='utf-8') as f:
+                    features = json.load(f).get('features', [])
+            except Exception:
+                features = []
+            coords = np.array([f['geometry']['coordinates'][:2] for f in features], dtype=np.float64).reshape(-1, 2)
+            counts = np.array([f['properties'].get('count', 0) for f in features], dtype=np.float64)
+            keys = _cell_key(coords[:, 1], coords[:, 0])
+        if not len(keys):
+            return
+        keys, inverse = np.unique(keys, return_inverse=True)
+        self._base_counts = np.bincount(inverse, weights=counts).astype(np.int64)
+        self._base_keys = keys
+        for i in np.argsort(-self._base_counts, kind='stable')[:leaders].tolist():
+            lat_i, lng_i = divmod(int(keys[i]), 360001)
+            cell = _cell((lat_i - 90000) / 1000.0, (lng_i - 180000) / 1000.0)
+            self.hotspots[cell] = max(self.hotspots.get(cell, 0), int(self._base_counts[i]))
+
+    def _baseline(self, lat, lng):
+        """Historical incidents of the cell containing lat/lng (0 when unknown)."""
+        key = _cell_key(lat, lng)
+        i = int(np.searchsorted(self._base_keys, key))
+        if i < len(self._base_keys) and self._base_keys[i] == key:
+            return int(self._base_counts[i])
+        return 0
+
+    def _read_new(self):
+        """Apply whole WAL lines appended since the last read, by any process.
+
+        Call with self._lock held (or from __init__) and the WAL locked.
+        Returns the deltas.
+        """
+        self._reader.seek(self._offset)
+        data = self._reader.read()
+        end = data.rfind(b'\n') + 1
+        deltas = []
+        for line in data[:end].splitlines():
+            try:
+                deltas.append(self._apply(json.loads(line)))
+            except Exception:
+                continue  # torn line after a crash
+        self._offset += end
+        return deltas
+
+    def _follow(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                if os.path.getsize(self.wal_path) <= self._offset:
+                    continue
+            except OSError:
+                continue
+            with self._lock:
+                with _WalLock(self._reader, exclusive=False):
+                    deltas = self._read_new()
+            self._publish(deltas)
+
+    def _apply(self, inc):
+        """Fold one normalized incident into the aggregates; return the delta."""
+        sev = SEVERITY_NAMES[inc['collision_severity']]
+        delta = {}
+        self.severity[sev] = self.severity.get(sev, 0) + 1
+        delta['severity'] = {sev: self.severity[sev]}
+
+        month = inc['date'][:7]
+        m = self.months.setdefault(month, {'month': month, 'incidents': 0, 'casualties': 0,
+                                           'severity_breakdown': {k: 0 for k in SEVERITY_NAMES.values()}})
+        m['incidents'] += 1
+        m['casualties'] += inc['number_of_casualties']
+        m['severity_breakdown'][sev] += 1
+        delta['month'] = dict(m, severity_breakdown=dict(m['severity_breakdown']))
+
+        if inc['latitude'] is not None:
+            cell = _cell(inc['latitude'], inc['longitude'])
+            if cell not in self.hotspots:
+                self.hotspots[cell] = self._baseline(inc['latitude'], inc['longitude'])
+            self.hotspots[cell] += 1
+            delta['hotspot'] = {'location': cell, 'incidents': self.hotspots[cell]}
+
+        if inc['police_force'] is not None:
+            f = self.forces.setdefault(inc['police_force'], {'attended': 0, 'incidents': 0})
+            f['incidents'] += 1
+            f['attended'] += inc['did_police_officer_attend_scene_of_accident']
+            delta['force'] = {'force_id': inc['police_force'], 'attended': f['attended'],
+                              'total_incidents': f['incidents'],
+                              'response_rate': round(100 * f['attended'] / f['incidents'], 2)}
+        self.ingested += 1
+        return delta
+
+    def ingest(self, incidents):
+        """Log and apply normalized incidents, then notify subscribers.
+
+        Returns the deltas of these incidents; incidents other processes
+        logged meanwhile are applied first and published too.
+        """
+        with self._lock:
+            with _WalLock(self._wal, exclusive=True):
+                others = self._read_new()
+                self._wal.write(b''.join(json.dumps(inc, separators=(',', ':')).encode('utf-8') + b'\n'
+                                         for inc in incidents))
+                self._wal.flush()
+                if self.fsync:
+                    os.fsync(self._wal.fileno())
+                self._offset = os.fstat(self._wal.fileno()).st_size
+            deltas = [self._apply(inc) for inc in incidents]
+        self._publish(others + deltas)
+        return deltas
+
+    def _publish(self, deltas):
+        if not deltas:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            for delta in deltas:
+                try:
+                    q.put_nowait(delta)
+                except queue.Full:
+                    # Slow consumer: drop it; the client reconnects and re-reads the snapshot
+                    self.unsubscribe(q)
+                    break
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'ingested_since_start': self.ingested,
+                'severity': dict(self.severity),
+                'monthly_trends': [dict(self.months[k]) for k in sorted(self.months)],
+                'top_hotspots': [{'location': k, 'incidents': v} for k, v in
+                                 sorted(self.hotspots.items(), key=lambda kv: kv[1], reverse=True)[:50]],
+                'by_police_force': [
+                    {'force_id': k, 'attended': v['attended'], 'total_incidents': v['incidents'],
+                     'response_rate': round(100 * v['attended'] / v['incidents'], 2) if v['incidents'] else 0.0}
+                    for k, v in sorted(self.forces.items(), key=lambda kv: kv[1]['incidents'], reverse=True)
+                ],
+            }
+
+    def subscribe(self, maxsize=1000):
+        q = queue.Queue(maxsize=maxsize)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def is_subscribed(self, q):
+        return q in self._subscribers
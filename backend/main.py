@@ -1,67 +1,272 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import os
+import queue
+import threading
 import numpy as np
 
+from features import FEATURE_NAMES, map_frontend_to_model_features, sweep_matrix
+from route_risk import HotspotIndex, decode_polyline
+from live_incidents import LiveAggregates, normalize_incident
+from heatmap_tiles import HeatmapTileRenderer, TileCache, load_points, source_version, tile_key
+from admission import AdmissionController, ClientRateLimiter, Shed
+from time_index import GRANULARITIES, DailyIndex, parse_day
+from emerging import MonthCellCounts, detect as detect_emerging
+from codes import CodeBook
+from attribution import AttributionCache, TreeAttribution
+from dataplane import FILENAME as DATAPLANE_FILENAME, HEATMAP_KEYS, DataPlane, encode_heatmap_frame, mapdata_payload
+
 app = Flask(__name__)
 CORS(app)
 
 # Load the ML model from backend/data/
 # The model is essential for /api/predict predictions
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'data', 'litemodel.sav')
-model = None
-try:
-    if os.path.exists(MODEL_PATH):
-        import joblib
-        model = joblib.load(MODEL_PATH)
-        print('Loaded model from', MODEL_PATH)
-    else:
-        print('Model not found at', MODEL_PATH, '- prediction API will be disabled until model is provided')
-except Exception as e:
-    print('Failed to load model:', e)
-    model = None
+# Seconds between checks of MODEL_PATH for a new file; 0 disables the watcher
+MODEL_POLL_SECONDS = float(os.environ.get('DRIVESMART_MODEL_POLL', '5'))
+# When set, admin endpoints require a matching X-Admin-Token header;
+# otherwise they only accept requests from localhost.
+ADMIN_TOKEN = os.environ.get('DRIVESMART_ADMIN_TOKEN')
 
 
-def map_frontend_to_model_features(payload: dict):
-    """Map frontend payload to numeric feature vector expected by the model.
+class ModelRegistry:
+    """Holds the active model and swaps in new versions without downtime.
 
-    This function keeps a small, robust mapping and provides defaults so the
-    API remains usable during frontend/back-end iteration.
+    Candidates are loaded and warmed on a background thread; the active
+    `(model, version)` pair is replaced by a single reference assignment, so
+    a request that already took a snapshot via `current()` finishes on the
+    model it started with.
     """
-    # Basic mappings / defaults
-    vehicle_map = {'car': 3, 'bike': 2, 'truck': 4, 'bus': 5}
-    weather_map = {'clear': 1, 'rain': 2, 'fog': 3, 'snow': 4}
 
-    # Read values with sensible fallbacks
-    Did_Police_Officer_Attend = float(payload.get('Did_Police_Officer_Attend', 0))
-    age_of_driver = float(payload.get('age_of_driver', 30.0))
+    def __init__(self, path):
+        self.path = path
+        self._active = (None, None)
+        self._attribution = (None, None)  # (version, TreeAttribution or None)
+        self._lock = threading.Lock()  # serializes loads, never held by predict
+        self._stat = None
+        self.loading = False
+        self.last_error = None
+        self.loaded_at = None
+
+    def current(self):
+        """Return the active `(model, version)` pair."""
+        return self._active
+
+    def attribution(self, model, version):
+        """Precomputed TreeAttribution for `model`, or None for non-tree models.
+
+        Built while a candidate is loaded, so requests only rebuild it when
+        they still hold a snapshot of a model that was swapped out.
+        """
+        cached_version, attribution = self._attribution
+        if cached_version != version:
+            try:
+                attribution = TreeAttribution(model)
+            except (TypeError, AttributeError):
+                attribution = None
+            self._attribution = (version, attribution)
+        return attribution
+
+    @staticmethod
+    def _file_version(path):
+        import hashlib
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        return h.hexdigest()[:12]
+
+    def load(self, path=None):
+        """Load, warm and activate the model at `path` (default: self.path).
+
+        Returns the activated version, or None when loading failed; the
+        previously active model keeps serving in that case.
+        """
+        import time
+        path = path or self.path
+        with self._lock:
+            self.loading = True
+            try:
+                import joblib
+                st = os.stat(path)
+                version = self._file_version(path)
+                if version == self._active[1]:
+                    self._stat = (st.st_mtime_ns, st.st_size)
+                    return version
+                candidate = joblib.load(path)
+                _warm_up(candidate)
+                self.attribution(candidate, version)
+                self._active = (candidate, version)
+                self._stat = (st.st_mtime_ns, st.st_size)
+                self.last_error = None
+                self.loaded_at = time.time()
+                print('Loaded model', version, 'from', path)
+                return version
+            except Exception as e:
+                self.last_error = str(e)
+                print('Failed to load model:', e)
+                return None
+            finally:
+                self.loading = False
+
+    def load_async(self, path=None):
+        t = threading.Thread(target=self.load, args=(path,), daemon=True)
+        t.start()
+        return t
+
+    def _changed(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return (st.st_mtime_ns, st.st_size) != self._stat
+
+    def watch(self, interval):
+        """Poll `self.path` and hot-swap whenever the file changes."""
+        import time
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                if self._changed() and not self.loading:
+                    self.load()
+
+        threading.Thread(target=loop, daemon=True, name='model-watcher').start()
+
+
+# Representative payloads used to warm a freshly loaded model before it is
+# swapped in (first predict calls pay for lazy allocations otherwise).
+WARMUP_PAYLOADS = [
+    {},
+    {'vehicle': 'bike', 'weather': 2, 'light': 4, 'speedl': 30, 'age_of_driver': 19},
+    {'vehicle': 'truck', 'weather': 3, 'roadsc': 2, 'speedl': 70, 'engine_cc': 12000},
+    {'vehicle': 'bus', 'weather': 4, 'roadsc': 4, 'day': 7, 'Did_Police_Officer_Attend': 1},
+]
+
+
+def _warm_up(candidate):
+    batch = np.vstack([map_frontend_to_model_features(p) for p in WARMUP_PAYLOADS])
+    for features in (batch[:1], batch):
+        candidate.predict(features)
+        if hasattr(candidate, 'predict_proba'):
+            candidate.predict_proba(features)
+
+
+model_registry = ModelRegistry(MODEL_PATH)
+if os.path.exists(MODEL_PATH):
+    model_registry.load()
+else:
+    print('Model not found at', MODEL_PATH, '- prediction API will be disabled until model is provided')
+if MODEL_POLL_SECONDS > 0:
+    model_registry.watch(MODEL_POLL_SECONDS)
+
+
+def _admin_allowed():
+    if ADMIN_TOKEN:
+        return request.headers.get('X-Admin-Token') == ADMIN_TOKEN
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+
+# Admission control for model inference: at most PREDICT_CONCURRENCY model
+# calls at once, up to PREDICT_QUEUE callers waiting at most
+# PREDICT_QUEUE_MS for a slot; everything else is shed with a fast 503.
+# Each client (by remote address) is also limited to PREDICT_RATE requests
+# per second with bursts of PREDICT_BURST; 0 disables the per-client limit.
+PREDICT_CONCURRENCY = int(os.environ.get('DRIVESMART_PREDICT_CONCURRENCY', str(os.cpu_count() or 4)))
+PREDICT_QUEUE = int(os.environ.get('DRIVESMART_PREDICT_QUEUE', '32'))
+PREDICT_QUEUE_MS = float(os.environ.get('DRIVESMART_PREDICT_QUEUE_MS', '500'))
+PREDICT_RATE = float(os.environ.get('DRIVESMART_PREDICT_RATE', '20'))
+PREDICT_BURST = float(os.environ.get('DRIVESMART_PREDICT_BURST', '40'))
+
+predict_admission = AdmissionController(PREDICT_CONCURRENCY, PREDICT_QUEUE, PREDICT_QUEUE_MS / 1000.0)
+predict_rate_limiter = ClientRateLimiter(PREDICT_RATE, PREDICT_BURST)
+
+
+def _rate_limited_response(retry_after):
+    resp = jsonify({'error': 'Too many requests from this client'})
+    resp.status_code = 429
+    resp.headers['Retry-After'] = str(max(int(np.ceil(retry_after)), 1))
+    return resp
+
+
+def _shed_response(shed):
+    resp = jsonify({'error': 'Server busy, try again shortly', 'reason': shed.reason})
+    resp.status_code = 503
+    resp.headers['Retry-After'] = str(shed.retry_after)
+    return resp
+
+
+def _predict_one(model, features):
+    pred = model.predict(features)
+    confidence = None
     try:
-        vehicle_type = float(payload.get('vehicle_type'))
+        probs = model.predict_proba(features)
+        confidence = float(np.max(probs) * 100)
     except Exception:
-        vehicle_type = vehicle_map.get(payload.get('vehicle', '').lower(), 3)
+        confidence = None
+    return pred, confidence
+
 
-    age_of_vehicle = float(payload.get('age_of_vehicle', 5.0))
-    engine_cc = float(payload.get('engine_cc', 1500.0))
-    day = int(float(payload.get('day', 1)))
-    weather_n = int(float(payload.get('weather', weather_map.get(payload.get('weather', '').lower(), 1))))
-    roadsc = int(float(payload.get('roadsc', 1)))
-    light = int(float(payload.get('light', 1)))
-    gender = int(float(payload.get('gender', 1)))
-    speedl = float(payload.get('speedl', 40.0))
+# Recent explanations per (model version, feature row)
+attribution_cache = AttributionCache()
+# Most inputs accepted by one /api/predict/explain request
+EXPLAIN_MAX_BATCH = 1000
 
-    arr = np.array([Did_Police_Officer_Attend, age_of_driver, vehicle_type, age_of_vehicle,
-                    engine_cc, day, weather_n, roadsc, light, gender, speedl])
-    return arr.astype(float).reshape(1, -1)
+
+def _explanations(attribution, version, features):
+    """Per-row attributions of the most severe class's probability.
+
+    Each contribution is one model input's share of the change from
+    `base_value` (the average over the training data) to `probability`.
+    """
+    probs, contrib = attribution_cache.explain(attribution, version, features)
+    # Severity codes run from most (1) to least (3) severe
+    risk_idx = int(np.argmin(attribution.classes))
+    risk_class = str(attribution.classes[risk_idx])
+    base_value = round(float(attribution.bias[risk_idx]), 4)
+    out = []
+    for row, p, c in zip(features, probs[:, risk_idx], contrib[:, :, risk_idx]):
+        order = np.argsort(-np.abs(c), kind='stable')
+        out.append({
+            'class': risk_class,
+            'base_value': base_value,
+            'probability': round(float(p), 4),
+            'contributions': [{'feature': FEATURE_NAMES[i], 'value': float(row[i]),
+                               'contribution': round(float(c[i]), 4)} for i in order.tolist()],
+        })
+    return out
+
+
+def _predict_and_explain(model, attribution, version, features):
+    pred, confidence = _predict_one(model, features)
+    return pred, confidence, _explanations(attribution, version, features)[0]
+
+
+def _want_explanation(payload):
+    flag = request.args.get('explain', payload.get('explain'))
+    return str(flag).lower() in ('1', 'true', 'yes')
 
 
 @app.route('/api/predict', methods=['POST'])
 def api_predict():
     """Predict endpoint used by the frontend.
 
-    Returns JSON with `prediction` and optional `confidence` when a model
-    is available. If no model is loaded, returns HTTP 503 with an explanatory
-    message so frontend development can continue.
+    Returns JSON with `prediction`, optional `confidence` and the
+    `model_version` that produced it when a model is available. If no model
+    is loaded, returns HTTP 503 with an explanatory message so frontend
+    development can continue. Under overload returns 429 (this client is
+    over its rate) or 503 with a `reason` (server queue full or deadline
+    missed), both with Retry-After.
+
+    With `?explain=1` (or `"explain": true` in the body) the response also
+    has an `explanation`: each input's contribution to the probability of
+    the most severe class, exact for the tree-ensemble model.
     """
+    allowed, retry_after = predict_rate_limiter.allow(request.remote_addr)
+    if not allowed:
+        return _rate_limited_response(retry_after)
+
+    model, version = model_registry.current()
     if model is None:
         return jsonify({'error': 'Model not available on server. Place model at ' + MODEL_PATH}), 503
 
@@ -71,16 +276,267 @@ def api_predict():
 
     try:
         features = map_frontend_to_model_features(payload)
-        pred = model.predict(features)
-        confidence = None
+        if _want_explanation(payload):
+            attribution = model_registry.attribution(model, version)
+            if attribution is None:
+                return jsonify({'error': 'Explanations are not supported for this model type'}), 501
+            pred, confidence, explanation = predict_admission.run(
+                _predict_and_explain, model, attribution, version, features)
+            return jsonify({'prediction': str(pred[0]), 'confidence': confidence, 'model_version': version,
+                            'explanation': explanation})
+        pred, confidence = predict_admission.run(_predict_one, model, features)
+        return jsonify({'prediction': str(pred[0]), 'confidence': confidence, 'model_version': version})
+    except Shed as shed:
+        return _shed_response(shed)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/predict/explain', methods=['POST'])
+def api_predict_explain():
+    """Batch explanations: `{"inputs": [<predict payload>, ...]}`.
+
+    Returns one explanation per input (see /api/predict?explain=1), in
+    order. Inputs already explained for this model version come from cache;
+    the rest are computed together in one pass over the trees.
+    """
+    allowed, retry_after = predict_rate_limiter.allow(request.remote_addr)
+    if not allowed:
+        return _rate_limited_response(retry_after)
+
+    model, version = model_registry.current()
+    if model is None:
+        return jsonify({'error': 'Model not available on server. Place model at ' + MODEL_PATH}), 503
+    attribution = model_registry.attribution(model, version)
+    if attribution is None:
+        return jsonify({'error': 'Explanations are not supported for this model type'}), 501
+
+    payload = request.get_json(force=True, silent=True) or {}
+    inputs = payload.get('inputs')
+    if not isinstance(inputs, list) or not inputs or not all(isinstance(p, dict) for p in inputs):
+        return jsonify({'error': 'expected {"inputs": [{...}, ...]}'}), 400
+    if len(inputs) > EXPLAIN_MAX_BATCH:
+        return jsonify({'error': 'at most {} inputs per request'.format(EXPLAIN_MAX_BATCH)}), 400
+    try:
+        features = np.vstack([map_frontend_to_model_features(p) for p in inputs])
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        explanations = predict_admission.run(_explanations, attribution, version, features)
+    except Shed as shed:
+        return _shed_response(shed)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'model_version': version, 'explanations': explanations})
+
+
+# Upper bounds on /api/predict/sweep grids
+SWEEP_MAX_POINTS = 10000
+SWEEP_MAX_AXIS = 1000
+
+
+def _sweep_values(axis):
+    """Values of one sweep axis: explicit `values`, or `start`/`stop`/`step` (stop inclusive)."""
+    if 'values' in axis:
+        values = axis['values']
+        if not isinstance(values, list) or not values:
+            raise ValueError('values must be a non-empty list')
+    else:
         try:
-            probs = model.predict_proba(features)
-            confidence = float(np.max(probs) * 100)
-        except Exception:
-            confidence = None
-        return jsonify({'prediction': str(pred[0]), 'confidence': confidence})
+            start, stop = float(axis['start']), float(axis['stop'])
+            step = float(axis.get('step', 1))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('each axis needs values or numeric start and stop')
+        if step <= 0 or stop < start:
+            raise ValueError('step must be positive and stop >= start')
+        if (stop - start) / step >= SWEEP_MAX_AXIS:
+            raise ValueError('at most {} values per axis'.format(SWEEP_MAX_AXIS))
+        values = np.round(np.arange(start, stop + step / 2, step), 6).tolist()
+    if len(values) > SWEEP_MAX_AXIS:
+        raise ValueError('at most {} values per axis'.format(SWEEP_MAX_AXIS))
+    return values
+
+
+def _predict_grid(model, features):
+    probs = model.predict_proba(features)
+    return model.classes_, probs
+
+
+@app.route('/api/predict/sweep', methods=['POST'])
+def api_predict_sweep():
+    """What-if sweep: score a base payload over one or two varying features.
+
+    Body: `{"base": {<predict payload>}, "sweep": [{"feature": "speedl",
+    "values": [20, 30, 40]}, {"feature": "age_of_driver", "start": 2.8,
+    "stop": 4.4, "step": 0.1}]}`. Features are /api/predict payload keys
+    (`vehicle` and `weather` also accept names). The whole grid is scored in
+    one model call. Returns `risk` (probability of the most severe class,
+    `risk_class`) and `prediction`, each shaped like the axes: a list for one
+    axis, a list of rows (first axis) of columns (second axis) for two.
+    """
+    allowed, retry_after = predict_rate_limiter.allow(request.remote_addr)
+    if not allowed:
+        return _rate_limited_response(retry_after)
+
+    model, version = model_registry.current()
+    if model is None or not hasattr(model, 'predict_proba'):
+        return jsonify({'error': 'Model not available on server. Place model at ' + MODEL_PATH}), 503
+
+    payload = request.get_json(force=True, silent=True) or {}
+    base = payload.get('base') or {}
+    sweep = payload.get('sweep')
+    if not isinstance(base, dict) or not isinstance(sweep, list) or not 1 <= len(sweep) <= 2:
+        return jsonify({'error': 'expected {"base": {...}, "sweep": [1 or 2 axes]}'}), 400
+    try:
+        axes = []
+        for axis in sweep:
+            if not isinstance(axis, dict) or not axis.get('feature'):
+                raise ValueError('each axis needs a feature')
+            axes.append((str(axis['feature']), _sweep_values(axis)))
+        if int(np.prod([len(v) for _, v in axes])) > SWEEP_MAX_POINTS:
+            raise ValueError('at most {} grid points'.format(SWEEP_MAX_POINTS))
+        features, shape = sweep_matrix(base, axes)
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        classes, probs = predict_admission.run(_predict_grid, model, features)
+    except Shed as shed:
+        return _shed_response(shed)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    # Severity codes run from most (1) to least (3) severe
+    risk_idx = int(np.argmin(classes))
+    return jsonify({
+        'model_version': version,
+        'axes': [{'feature': key, 'values': values} for key, values in axes],
+        'shape': list(shape),
+        'classes': [str(c) for c in classes],
+        'risk_class': str(classes[risk_idx]),
+        'risk': np.round(probs[:, risk_idx], 4).reshape(shape).tolist(),
+        'prediction': classes[probs.argmax(axis=1)].astype(str).reshape(shape).tolist(),
+    })
+
+
+@app.route('/api/admin/admission', methods=['GET'])
+def admin_admission_metrics():
+    """Admission counters, queue state and queue-wait percentiles for /api/predict."""
+    if not _admin_allowed():
+        return jsonify({'error': 'forbidden'}), 403
+    return jsonify({'predict': dict(predict_admission.metrics(), **predict_rate_limiter.metrics())})
+
+
+@app.route('/api/admin/model', methods=['GET'])
+def admin_model_status():
+    """Report the active model version and the state of any pending reload."""
+    if not _admin_allowed():
+        return jsonify({'error': 'forbidden'}), 403
+    _, version = model_registry.current()
+    return jsonify({
+        'version': version,
+        'path': model_registry.path,
+        'loading': model_registry.loading,
+        'loaded_at': model_registry.loaded_at,
+        'last_error': model_registry.last_error,
+        'explanation_cache': attribution_cache.stats(),
+    })
+
+
+@app.route('/api/admin/model/reload', methods=['POST'])
+def admin_model_reload():
+    """Load and warm a model in the background, then swap it in.
+
+    Optional JSON body: `{"path": "<file under backend/data>"}`; defaults to
+    MODEL_PATH. Returns 202 immediately; poll GET /api/admin/model for the
+    resulting version.
+    """
+    if not _admin_allowed():
+        return jsonify({'error': 'forbidden'}), 403
+    payload = request.get_json(silent=True) or {}
+    path = MODEL_PATH
+    if payload.get('path'):
+        data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data'))
+        path = os.path.abspath(os.path.join(data_dir, payload['path']))
+        if os.path.commonpath([data_dir, path]) != data_dir:
+            return jsonify({'error': 'path must be inside backend/data'}), 400
+    if not os.path.exists(path):
+        return jsonify({'error': 'model file not found: ' + path}), 404
+    if model_registry.loading:
+        return jsonify({'error': 'a model reload is already in progress'}), 409
+    model_registry.path = path
+    model_registry.load_async(path)
+    return jsonify({'status': 'loading', 'path': path}), 202
+
+
+# Packed, memory-mapped copy of the served datasets written by
+# scripts/pack_dataplane.py. Every worker maps the same file and serves
+# views into it; replacing the file (atomic rename) switches all workers on
+# their next request. Datasets that are not packed, or whose source files
+# changed since packing, are read from the pipeline outputs as before.
+DATAPLANE_PATH = os.path.join(os.path.dirname(__file__), 'data', DATAPLANE_FILENAME)
+DATAPLANE_DATA_DIR = os.path.dirname(DATAPLANE_PATH)
+# Bytes copied out of the mapping per write when streaming a response
+DATAPLANE_CHUNK = 64 << 10
+
+# (file identity, DataPlane or None), replaced as one tuple
+_dataplane = {'current': (None, None)}
+_dataplane_lock = threading.Lock()
+
+
+def _data_plane(dataset=None):
+    """Return the mapped DataPlane, or None when there is no usable file.
+
+    With `dataset`, None is also returned unless that dataset is packed and
+    its sources are unchanged, so the caller falls back to the files.
+    """
+    try:
+        st = os.stat(DATAPLANE_PATH)
+    except OSError:
+        return None
+    stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+    if _dataplane['current'][0] != stat:
+        with _dataplane_lock:
+            if _dataplane['current'][0] != stat:
+                try:
+                    plane = DataPlane(DATAPLANE_PATH)
+                    print('Mapped data plane', plane.version, 'from', DATAPLANE_PATH)
+                except Exception as e:
+                    print('Failed to map data plane:', e)
+                    plane = None
+                # The previous mapping is released once no response uses it
+                _dataplane['current'] = (stat, plane)
+    plane = _dataplane['current'][1]
+    if plane is not None and dataset is not None and not plane.current(dataset, DATAPLANE_DATA_DIR):
+        return None
+    return plane
+
+
+def _coalesce(parts, size=DATAPLANE_CHUNK):
+    """Join bytes-like `parts` (e.g. data plane views) into chunks of about `size` bytes."""
+    buf = bytearray()
+    for part in parts:
+        buf += part
+        if len(buf) >= size:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+
+def _views_response(parts, length, etag, mimetype='application/json'):
+    """Stream `parts` totalling `length` bytes with an ETag, honouring If-None-Match.
+
+    Views into the data plane are copied out a chunk at a time while the
+    response is written, so no worker holds a private copy of the body.
+    """
+    if etag and request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(_coalesce(parts), mimetype=mimetype)
+        resp.headers['Content-Length'] = str(length)
+    resp.set_etag(etag)
+    return resp
 
 
 def _load_mapdata_json(path=None):
@@ -107,51 +563,417 @@ def api_mapdata():
 
     Response example: { "api_key": "...", "locations": [ {"lat": .., "lng": ..}, ... ] }
     """
+    plane = _data_plane('mapdata')
+    if plane is not None:
+        return _json_bytes_response(*plane.blob('mapdata'))
+
     data = _load_mapdata_json()
     if not data:
         return jsonify({'error': 'map data not found at backend/data/mapdata.json'}), 404
 
-    state = data.get('state', {})
-    api_key = None
-    locations = []
-
-    for k, v in state.items():
-        if not isinstance(v, dict):
-            continue
-        model_name = v.get('model_name')
-        s = v.get('state', {})
-        if model_name == 'PlainmapModel':
-            cfg = s.get('configuration', {})
-            if cfg.get('api_key'):
-                api_key = cfg.get('api_key')
-        if model_name == 'SimpleHeatmapLayerModel':
-            locs = s.get('locations', [])
-            for pair in locs:
-                if isinstance(pair, list) and len(pair) >= 2:
-                    locations.append({'lat': float(pair[0]), 'lng': float(pair[1])})
-
-    return jsonify({'api_key': api_key, 'locations': locations})
+    return jsonify(mapdata_payload(data))
+
+HEATMAP_SLICES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'heatmap_slices.npz')
+
+# Parsed heatmap_slices.npz plus per-slice JSON frames encoded on first use;
+# replaced wholesale when the file changes.
+_heatmap_slices = {'stat': None, 'arrays': None, 'frames': {}}
+
+
+def _load_heatmap_slices():
+    """Return the time-sliced heatmap arrays written by process_accidents.py.
+
+    Keys: `lat`, `lng` (per cell), `indptr` (169 entries, one CSR row per
+    (day_of_week, hour) slice), `indices` (cell ids) and `counts`.
+    Returns None when the file is missing or unreadable. Served from the
+    data plane when it is current, where frames are pre-encoded too.
+    """
+    plane = _data_plane('heatmap')
+    if plane is not None:
+        stat = ('plane', plane.version)
+        if _heatmap_slices['stat'] != stat:
+            arrays = {k: plane.array('heatmap.' + k) for k in HEATMAP_KEYS}
+            _heatmap_slices.update(stat=stat, arrays=arrays, frames=plane.strings('heatmap.frames'))
+        return _heatmap_slices['arrays']
+    try:
+        st = os.stat(HEATMAP_SLICES_PATH)
+    except OSError:
+        return None
+    stat = (st.st_mtime_ns, st.st_size)
+    if _heatmap_slices['stat'] != stat:
+        try:
+            with np.load(HEATMAP_SLICES_PATH) as npz:
+                arrays = {k: npz[k] for k in npz.files}
+        except Exception:
+            return None
+        arrays['lat'] = np.round(arrays['lat'].astype(np.float64), 3)
+        arrays['lng'] = np.round(arrays['lng'].astype(np.float64), 3)
+        _heatmap_slices.update(stat=stat, arrays=arrays, frames={})
+    return _heatmap_slices['arrays']
+
+
+def _heatmap_frame(slot):
+    """Compact JSON bytes for one slice: `{day, hour, lat[], lng[], count[]}`."""
+    frames = _heatmap_slices['frames']
+    body = frames.get(slot)
+    if body is None:
+        body = encode_heatmap_frame(_heatmap_slices['arrays'], slot)
+        frames[slot] = body
+    return body
+
+
+def _heatmap_etag(*parts):
+    stat = _heatmap_slices['stat']
+    return '{}-{}-{}'.format(stat[0], stat[1], '-'.join(str(p) for p in parts))
+
+
+@app.route('/api/heatmap/slice', methods=['GET'])
+def api_heatmap_slice():
+    """Heatmap counts for one day_of_week (1=Sunday .. 7=Saturday) and hour (0-23).
+
+    Example: /api/heatmap/slice?day=6&hour=17 -> Friday 17:00-17:59.
+    """
+    if _load_heatmap_slices() is None:
+        return jsonify({'error': 'heatmap slices not found; run scripts/process_accidents.py'}), 404
+    day = request.args.get('day', type=int)
+    hour = request.args.get('hour', type=int)
+    if day is None or hour is None or not (1 <= day <= 7 and 0 <= hour <= 23):
+        return jsonify({'error': 'day (1-7) and hour (0-23) are required'}), 400
+    slot = (day - 1) * 24 + hour
+    return _json_bytes_response(_heatmap_frame(slot), _heatmap_etag(slot))
+
+
+@app.route('/api/heatmap/frames', methods=['GET'])
+def api_heatmap_frames():
+    """Animation frames in slice order: `{"frames": [<slice>, ...]}`.
+
+    With `day` only that day's 24 hourly frames are returned, otherwise all
+    168 frames of the week. Frames are encoded once and reused.
+    """
+    if _load_heatmap_slices() is None:
+        return jsonify({'error': 'heatmap slices not found; run scripts/process_accidents.py'}), 404
+    day = request.args.get('day', type=int)
+    if day is not None and not 1 <= day <= 7:
+        return jsonify({'error': 'day must be between 1 and 7'}), 400
+    slots = range((day - 1) * 24, day * 24) if day else range(7 * 24)
+    body = b'{"frames":[' + b','.join(_heatmap_frame(i) for i in slots) + b']}'
+    return _json_bytes_response(body, _heatmap_etag('day', day or 'all'))
+
+
+DAILY_INDEX_PATH = os.path.join(os.path.dirname(__file__), 'data', 'daily_index.npz')
+
+# DailyIndex plus the (mtime_ns, size) of the file it was loaded from
+_daily_index = {'stat': None, 'index': None}
+
+
+def _load_daily_index():
+    """Return the DailyIndex written by process_accidents.py, or None."""
+    try:
+        st = os.stat(DAILY_INDEX_PATH)
+    except OSError:
+        return None
+    stat = (st.st_mtime_ns, st.st_size)
+    if _daily_index['stat'] != stat:
+        try:
+            _daily_index.update(stat=stat, index=DailyIndex(DAILY_INDEX_PATH))
+        except Exception:
+            return None
+    return _daily_index['index']
+
+
+def _shift_year(day, years):
+    from datetime import date
+    d = day.item()
+    try:
+        return np.datetime64(d.replace(year=d.year + years), 'D')
+    except ValueError:  # 29 February
+        return np.datetime64(date(d.year + years, 2, 28), 'D')
+
+
+@app.route('/api/trends', methods=['GET'])
+def api_trends():
+    """Incidents, casualties and severity for any date range and granularity.
+
+    Query: `from`, `to` (YYYY-MM-DD, inclusive, default: the whole index),
+    `granularity` (day, week, month, quarter, year or total; default month)
+    and optional `compare` (`previous`: the same-length period just before,
+    `year`: the same dates one year earlier).
+    Example: /api/trends?from=2024-10-01&to=2024-11-14&granularity=week&compare=year
+    """
+    index = _load_daily_index()
+    if index is None:
+        return jsonify({'error': 'daily index not found; run scripts/process_accidents.py'}), 404
+    granularity = request.args.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': 'granularity must be one of ' + ', '.join(GRANULARITIES)}), 400
+    compare = request.args.get('compare')
+    if compare not in (None, 'previous', 'year'):
+        return jsonify({'error': 'compare must be previous or year'}), 400
+    try:
+        first = parse_day(request.args['from']) if request.args.get('from') else index.start
+        last = parse_day(request.args['to']) if request.args.get('to') else index.end - 1
+        if last < first:
+            return jsonify({'error': 'to must not be before from'}), 400
+        result = {'from': str(first), 'to': str(last), 'granularity': granularity,
+                  'coverage': index.coverage()}
+        result.update(index.trends(first, last, granularity))
+        if compare == 'previous':
+            span = last - first + 1
+            result['compare'] = index.trends(first - span, last - span, granularity)
+        elif compare == 'year':
+            result['compare'] = index.trends(_shift_year(first, -1), _shift_year(last, -1), granularity)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+# Bounds on /api/route-risk input so one request cannot monopolize a worker
+ROUTE_MAX_ROUTES = 500
+ROUTE_MIN_SPACING_M = 10.0
+
+# HotspotIndex plus the (mtime_ns, size) of the files it was built from
+_route_index = {'stat': None, 'index': None}
+
+
+def _load_route_index():
+    """Return the HotspotIndex, rebuilding it when the pipeline outputs change."""
+    plane = _data_plane('route')
+    if plane is not None:
+        stat = ('plane', plane.version)
+        if _route_index['stat'] != stat:
+            index = HotspotIndex(plane.array('route.lat'), plane.array('route.lng'), plane.array('route.weight'))
+            _route_index.update(stat=stat, index=index)
+        return _route_index['index']
+    stat = []
+    for name in ('accidents_hotspots.geojson', os.path.join('reports', 'hotspot_analysis_report.json')):
+        try:
+            st = os.stat(os.path.join(DATA_DIR, name))
+            stat.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stat.append(None)
+    if _route_index['stat'] != stat:
+        _route_index.update(stat=stat, index=HotspotIndex.from_data_dir(DATA_DIR))
+    return _route_index['index']
+
+
+def _parse_route(route):
+    """Accept an encoded polyline string or a list of [lat, lng] pairs."""
+    if isinstance(route, str):
+        path = decode_polyline(route)
+    else:
+        path = np.asarray(route, dtype=float).reshape(-1, 2)
+    if len(path) == 0 or not np.isfinite(path).all():
+        raise ValueError('route must contain at least one valid [lat, lng] point')
+    return path
+
+
+@app.route('/api/route-risk', methods=['POST'])
+def api_route_risk():
+    """Score planned journeys against accident hotspots.
+
+    Body: `{"polyline": "<encoded>" | [[lat, lng], ...], "spacing_m": 50}`
+    or `{"routes": [<polyline>, ...]}` to score many routes in one call.
+    Each route gets `total_risk`, `risk_per_km`, `length_m` and per-segment
+    risk, where risk sums severity-weighted hotspot density along the route.
+    """
+    payload = request.get_json(silent=True)
+    if not payload:
+        return jsonify({'error': 'No JSON payload received'}), 400
+    index = _load_route_index()
+    if index is None:
+        return jsonify({'error': 'hotspot data not found'}), 404
+
+    batch = 'routes' in payload
+    raw = payload.get('routes') if batch else [payload.get('polyline')]
+    if not isinstance(raw, list) or not raw or any(r is None for r in raw):
+        return jsonify({'error': 'provide `polyline` or a non-empty `routes` list'}), 400
+    if len(raw) > ROUTE_MAX_ROUTES:
+        return jsonify({'error': 'at most {} routes per request'.format(ROUTE_MAX_ROUTES)}), 400
+    try:
+        spacing = max(float(payload.get('spacing_m', 50.0)), ROUTE_MIN_SPACING_M)
+        routes = [_parse_route(r) for r in raw]
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    results = index.score_routes(routes, spacing)
+    if batch:
+        return jsonify({'spacing_m': spacing, 'routes': results})
+    return jsonify(dict(results[0], spacing_m=spacing))
+
+
+TILES_CACHE_DIR = os.path.join(DATA_DIR, 'tiles')
+TILE_MAX_ZOOM = 18
+tile_cache = TileCache(TILES_CACHE_DIR,
+                       max_memory_tiles=int(os.environ.get('DRIVESMART_TILE_MEMORY', '2048')),
+                       max_disk_bytes=int(os.environ.get('DRIVESMART_TILE_DISK_MB', '256')) << 20)
+
+# HeatmapTileRenderer for the current points source and that source's version
+_tile_renderer = {'key': None, 'version': None, 'renderer': None}
+_tile_renderer_lock = threading.Lock()
+
+
+def _load_tile_renderer():
+    """Return `(renderer, version)`, rebuilding when the points source changes.
+
+    From the data plane the renderer works on the packed, pre-projected
+    points directly; `version` is still that of the source file, so cached
+    tiles stay valid.
+    """
+    plane = _data_plane('tiles')
+    if plane is not None:
+        version = plane.meta['tiles_version']
+        key = ('plane', plane.version)
+        if _tile_renderer['key'] != key:
+            with _tile_renderer_lock:
+                if _tile_renderer['key'] != key:
+                    renderer = HeatmapTileRenderer.from_projected(
+                        plane.array('tiles.x'), plane.array('tiles.y'), plane.array('tiles.weight'))
+                    _tile_renderer.update(key=key, version=version, renderer=renderer)
+        return _tile_renderer['renderer'], _tile_renderer['version']
+    for name in ('heatmap_slices.npz', 'accidents_hotspots.geojson'):
+        path = os.path.join(DATA_DIR, name)
+        if os.path.exists(path):
+            version = source_version(path)
+            break
+    else:
+        return None, None
+    key = ('file', version)
+    if _tile_renderer['key'] != key:
+        with _tile_renderer_lock:
+            if _tile_renderer['key'] != key:
+                points = load_points(DATA_DIR)
+                renderer = HeatmapTileRenderer(*points[:3]) if points else None
+                _tile_renderer.update(key=key, version=version, renderer=renderer)
+    return _tile_renderer['renderer'], _tile_renderer['version']
+
+
+@app.route('/api/tiles/heatmap/<int:z>/<int:x>/<int:y>.png', methods=['GET'])
+def api_heatmap_tile(z, x, y):
+    """256px accident density tile in Web Mercator (Google/OSM tile scheme)."""
+    if not 0 <= z <= TILE_MAX_ZOOM or not 0 <= y < (1 << z):
+        return jsonify({'error': 'tile out of range'}), 404
+    renderer, version = _load_tile_renderer()
+    if renderer is None:
+        return jsonify({'error': 'heatmap data not found'}), 404
+    x %= 1 << z
+    key = tile_key(version, z, x, y)
+    body = tile_cache.get(key)
+    if body is None:
+        body = renderer.render(z, x, y)
+        # Empty tiles are cheap to recreate; keep them off the disk cache
+        tile_cache.put(key, body, disk=body is not renderer.empty_tile())
+    resp = Response(body, mimetype='image/png')
+    resp.set_etag(key.replace('/', '-'))
+    resp.headers['Cache-Control'] = 'public, max-age=3600'
+    return resp.make_conditional(request)
+
+
+ANALYTICS_SUMMARY_PATH = os.path.join(os.path.dirname(__file__), 'data', 'accidents_summary.json')
+ANALYTICS_HOTSPOTS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'accidents_hotspots.geojson')
+ANALYTICS_HOTSPOTS_NDJSON_PATH = os.path.join(os.path.dirname(__file__), 'data', 'accidents_hotspots.ndjson')
+
+
+def _analytics_plane():
+    """The data plane when both analytics datasets are current in it, else None."""
+    if _data_plane('summary') is None:
+        return None
+    return _data_plane('hotspots')
+
+
+def _plane_geojson(plane):
+    """`(parts, length)` of the hotspot GeoJSON, stitched from the packed Features."""
+    head, _ = plane.blob('hotspots.head')
+    features = plane.strings('hotspots.features')
+    prefix = bytes(head[:-1]) + (b',' if len(head) > 2 else b'') + b'"features":['
+
+    def parts():
+        yield prefix
+        for i, feature in enumerate(features):
+            if i:
+                yield b','
+            yield feature
+        yield b']}'
+
+    return parts(), len(prefix) + features.nbytes + max(len(features) - 1, 0) + 2
+
+
+def _iter_plane_ndjson(plane):
+    summary, _ = plane.blob('summary')
+    yield b'{"summary":' + bytes(summary) + b'}\n'
+    for feature in plane.strings('hotspots.features'):
+        yield feature
+        yield b'\n'
+
+
+def _iter_analytics_ndjson():
+    """Yield the analytics payload as newline-delimited JSON.
+
+    The first line is `{"summary": ...}`, followed by one GeoJSON Feature per
+    line. Features are copied line by line from accidents_hotspots.ndjson so
+    memory stays flat; older pipelines without that file fall back to
+    reading the GeoJSON.
+    """
+    import json
+    try:
+        with open(ANALYTICS_SUMMARY_PATH, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+    except Exception:
+        summary = None
+    yield json.dumps({'summary': summary}, separators=(',', ':')) + '\n'
+
+    if os.path.exists(ANALYTICS_HOTSPOTS_NDJSON_PATH):
+        with open(ANALYTICS_HOTSPOTS_NDJSON_PATH, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield line if line.endswith('\n') else line + '\n'
+        return
+    try:
+        with open(ANALYTICS_HOTSPOTS_PATH, 'r', encoding='utf-8') as f:
+            features = json.load(f).get('features', [])
+    except Exception:
+        features = []
+    for feature in features:
+        yield json.dumps(feature, separators=(',', ':')) + '\n'
+
 
 @app.route('/api/analytics', methods=['GET'])
 def api_analytics():
     """Return precomputed analytics summaries and hotspots.
 
-    Reads `backend/data/accidents_summary.json` and `backend/data/accidents_hotspots.geojson`.
+    Reads `backend/data/accidents_summary.json` and `backend/data/accidents_hotspots.geojson`,
+    or streams both from the data plane without parsing when it is current.
+    With `?stream=1` (or `Accept: application/x-ndjson`) the response is
+    streamed as NDJSON instead, see `_iter_analytics_ndjson`.
     """
+    import itertools
     import json
-    base = os.path.join(os.path.dirname(__file__), 'data')
-    summary_path = os.path.join(base, 'accidents_summary.json')
-    hotspots_path = os.path.join(base, 'accidents_hotspots.geojson')
+    plane = _analytics_plane()
+    if request.args.get('stream') in ('1', 'true') or \
+            request.accept_mimetypes.best == 'application/x-ndjson':
+        if plane is not None:
+            return Response(_coalesce(_iter_plane_ndjson(plane)), mimetype='application/x-ndjson')
+        paths = (ANALYTICS_SUMMARY_PATH, ANALYTICS_HOTSPOTS_PATH, ANALYTICS_HOTSPOTS_NDJSON_PATH)
+        if not any(os.path.exists(p) for p in paths):
+            return jsonify({'error': 'analytics data not found'}), 404
+        return Response(_iter_analytics_ndjson(), mimetype='application/x-ndjson')
+
+    if plane is not None:
+        summary, _ = plane.blob('summary')
+        hotspots, length = _plane_geojson(plane)
+        head, mid, tail = b'{"summary":', b',"hotspots":', b'}'
+        parts = itertools.chain((head, summary, mid), hotspots, (tail,))
+        return _views_response(parts, len(head) + len(summary) + len(mid) + length + len(tail), plane.version)
 
     summary = None
     hotspots = None
     try:
-        with open(summary_path, 'r', encoding='utf-8') as f:
+        with open(ANALYTICS_SUMMARY_PATH, 'r', encoding='utf-8') as f:
             summary = json.load(f)
     except Exception:
         summary = None
     try:
-        with open(hotspots_path, 'r', encoding='utf-8') as f:
+        with open(ANALYTICS_HOTSPOTS_PATH, 'r', encoding='utf-8') as f:
             hotspots = json.load(f)
     except Exception:
         hotspots = None
@@ -161,69 +983,373 @@ def api_analytics():
 
     return jsonify({'summary': summary, 'hotspots': hotspots})
 
+
+REPORTS_DIR = os.path.join(os.path.dirname(__file__), 'data', 'reports')
+
+# Report slug (as used in /api/reports/<slug>) -> file in backend/data/reports/
+REPORT_FILES = {
+    'monthly-safety': 'monthly_safety_report.json',
+    'hotspot-analysis': 'hotspot_analysis_report.json',
+    'emergency-response': 'emergency_response_metrics.json',
+    'monthly-trends': 'monthly_trends.json',
+    'risk-factors': 'risk_factors_analysis.json',
+    'severity-distribution': 'severity_distribution.json',
+    'emerging-hotspots': 'emerging_hotspots.json',
+}
+
+# Code -> label lists compiled from the data guide by scripts/compile_codes.py;
+# loaded once here so the spreadsheet is never read at runtime.
+CODES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'codes.json')
+try:
+    codebook = CodeBook(CODES_PATH)
+except Exception as e:
+    codebook = None
+    print('Code lists not loaded from', CODES_PATH, '-', e, '- run scripts/compile_codes.py')
+
+
+def _label_risk_factors(data):
+    columns = {'light_conditions': 'light_conditions', 'weather_conditions': 'weather_conditions',
+               'road_surface_conditions': 'road_surface_conditions',
+               'special_conditions': 'special_conditions_at_site'}
+    for key, field in columns.items():
+        codebook.annotate(data.get('factors', {}).get(key), 'factor', field)
+
+
+def _label_emergency_response(data):
+    codebook.annotate(data.get('police_response', {}).get('by_police_force'), 'force_id', 'police_force')
+
+
+def _label_severity_distribution(data):
+    # Older reports carry only `severity_level` ("Serious"); recover the code
+    # from the data guide's labels so they are labelled the same way
+    by_label = {label.lower(): code for code, label in codebook.fields.get('collision_severity', {}).items()}
+    for item in data.get('distribution') or []:
+        if isinstance(item, dict) and item.get('code') is None:
+            code = by_label.get(str(item.get('severity_level', '')).lower())
+            if code is not None:
+                item['code'] = int(code)
+    codebook.annotate(data.get('distribution'), 'code', 'collision_severity')
+
+
+# filename -> function adding `label` fields next to the numeric codes in a
+# parsed report (used for ?labels=1)
+REPORT_LABELERS = {
+    'risk_factors_analysis.json': _label_risk_factors,
+    'emergency_response_metrics.json': _label_emergency_response,
+    'severity_distribution.json': _label_severity_distribution,
+}
+
+# (filename, labels) -> (mtime_ns, size, body_bytes, etag). Bodies are compact
+# JSON serialized once per file version so requests never re-parse the report.
+_report_cache = {}
+_report_cache_lock = threading.Lock()
+
+
+def _want_labels():
+    return request.args.get('labels', '').lower() in ('1', 'true', 'yes')
+
+
 def _load_report(filename):
     """Helper to load a report JSON file from backend/data/reports/"""
     import json
     try:
-        path = os.path.join(os.path.dirname(__file__), 'data', 'reports', filename)
+        path = os.path.join(REPORTS_DIR, filename)
         with open(path, 'r', encoding='utf-8') as f:
             return json.load(f)
     except Exception:
         return None
 
 
+def _report_fragment(filename, labels=False):
+    """Return `(body_bytes, etag)` for a report, or `(None, None)` if missing.
+
+    The file is parsed and re-serialized only when its mtime/size changes;
+    otherwise the cached bytes are returned as-is. With `labels`, code
+    fields get a `label` from the data guide (see REPORT_LABELERS).
+    Unlabelled reports come straight from the data plane when it is current
+    (the body is then a memoryview into the mapped file).
+    """
+    import json
+    import hashlib
+    labels = bool(labels and codebook is not None and filename in REPORT_LABELERS)
+    if not labels:
+        plane = _data_plane('report/' + filename)
+        if plane is not None:
+            return plane.blob('report/' + filename)
+    path = os.path.join(REPORTS_DIR, filename)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, None
+    cached = _report_cache.get((filename, labels))
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2], cached[3]
+
+    data = _load_report(filename)
+    if not data:
+        return None, None
+    if labels:
+        REPORT_LABELERS[filename](data)
+    body = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    etag = hashlib.sha1(body).hexdigest()[:16]
+    with _report_cache_lock:
+        _report_cache[(filename, labels)] = (st.st_mtime_ns, st.st_size, body, etag)
+    return body, etag
+
+
+def _json_bytes_response(body, etag):
+    """Serve pre-serialized JSON bytes with an ETag, honouring If-None-Match."""
+    if isinstance(body, memoryview):
+        return _views_response((body,), len(body), etag)
+    if etag and request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(body, mimetype='application/json')
+    resp.set_etag(etag)
+    return resp
+
+
+def _report_response(slug):
+    body, etag = _report_fragment(REPORT_FILES[slug], _want_labels())
+    if body is None:
+        return jsonify({'error': 'report not found'}), 404
+    return _json_bytes_response(body, etag)
+
+
 @app.route('/api/reports/monthly-safety', methods=['GET'])
 def report_monthly_safety():
     """Monthly Safety Report: Comprehensive analysis of accident trends"""
-    data = _load_report('monthly_safety_report.json')
-    if not data:
-        return jsonify({'error': 'report not found'}), 404
-    return jsonify(data)
+    return _report_response('monthly-safety')
 
 
 @app.route('/api/reports/hotspot-analysis', methods=['GET'])
 def report_hotspot_analysis():
     """Hotspot Analysis Report: High-risk zones and recommendations"""
-    data = _load_report('hotspot_analysis_report.json')
-    if not data:
-        return jsonify({'error': 'report not found'}), 404
-    return jsonify(data)
+    return _report_response('hotspot-analysis')
 
 
 @app.route('/api/reports/emergency-response', methods=['GET'])
 def report_emergency_response():
     """Emergency Response Metrics: Response time and resource allocation"""
-    data = _load_report('emergency_response_metrics.json')
-    if not data:
-        return jsonify({'error': 'report not found'}), 404
-    return jsonify(data)
+    return _report_response('emergency-response')
 
 
 @app.route('/api/reports/monthly-trends', methods=['GET'])
 def report_monthly_trends():
     """Monthly Trend Analysis: Incident counts per month"""
-    data = _load_report('monthly_trends.json')
-    if not data:
-        return jsonify({'error': 'report not found'}), 404
-    return jsonify(data)
+    return _report_response('monthly-trends')
 
 
 @app.route('/api/reports/risk-factors', methods=['GET'])
 def report_risk_factors():
     """Top Risk Factors: Contributing factors to accidents"""
-    data = _load_report('risk_factors_analysis.json')
-    if not data:
-        return jsonify({'error': 'report not found'}), 404
-    return jsonify(data)
+    return _report_response('risk-factors')
 
 
 @app.route('/api/reports/severity-distribution', methods=['GET'])
 def report_severity_distribution():
     """Severity Distribution: Breakdown by severity level"""
-    data = _load_report('severity_distribution.json')
-    if not data:
+    return _report_response('severity-distribution')
+
+
+@app.route('/api/reports/emerging-hotspots', methods=['GET'])
+def report_emerging_hotspots():
+    """Emerging Hotspots: locations with significant recent increases"""
+    return _report_response('emerging-hotspots')
+
+
+MONTHLY_CELLS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'monthly_cells.npz')
+EMERGING_CACHE_SIZE = 32
+
+# MonthCellCounts for the current monthly_cells.npz plus detection results
+# keyed by query parameters; both dropped when the file changes.
+_emerging = {'stat': None, 'data': None, 'results': {}}
+_emerging_lock = threading.Lock()
+
+
+def _emerging_result(params):
+    try:
+        st = os.stat(MONTHLY_CELLS_PATH)
+    except OSError:
+        return None
+    stat = (st.st_mtime_ns, st.st_size)
+    with _emerging_lock:
+        if _emerging['stat'] != stat:
+            _emerging.update(stat=stat, data=MonthCellCounts(MONTHLY_CELLS_PATH), results={})
+        data, results = _emerging['data'], _emerging['results']
+        if params in results:
+            return results[params]
+    result = detect_emerging(data, **dict(params))
+    with _emerging_lock:
+        if _emerging['data'] is data:
+            if len(results) >= EMERGING_CACHE_SIZE:
+                results.pop(next(iter(results)))
+            results[params] = result
+    return result
+
+
+@app.route('/api/hotspots/emerging', methods=['GET'])
+def api_emerging_hotspots():
+    """Cells whose incidents rose significantly faster than the network.
+
+    Query: `recent` (months, default 3), `baseline` (months before the
+    recent window, default all), `alpha` (false discovery rate, default
+    0.05), `min_recent` (default 3) and `limit` (default 100, max 1000).
+    The precomputed default run is served by /api/reports/emerging-hotspots.
+    """
+    try:
+        params = (
+            ('recent', request.args.get('recent', 3, type=int)),
+            ('baseline', request.args.get('baseline', type=int)),
+            ('alpha', min(max(request.args.get('alpha', 0.05, type=float), 1e-9), 1.0)),
+            ('min_recent', max(request.args.get('min_recent', 3, type=int), 1)),
+            ('limit', min(max(request.args.get('limit', 100, type=int), 1), 1000)),
+        )
+        result = _emerging_result(params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if result is None:
+        return jsonify({'error': 'month x cell counts not found; run scripts/process_accidents.py'}), 404
+    return jsonify(result)
+
+
+@app.route('/api/reports/bundle', methods=['GET'])
+def report_bundle():
+    """Return several reports in one response.
+
+    Query: `include` is a comma-separated list of report slugs (see
+    REPORT_FILES); all reports are returned when omitted. The body is
+    `{ "<slug>": <report or null>, ... }`, stitched together from the cached
+    per-report fragments, with a single ETag covering every fragment.
+    `labels=1` embeds code labels as in the single-report endpoints.
+    """
+    import hashlib
+    include = request.args.get('include', '')
+    slugs = [s.strip() for s in include.split(',') if s.strip()] or list(REPORT_FILES)
+    unknown = [s for s in slugs if s not in REPORT_FILES]
+    if unknown:
+        return jsonify({'error': 'unknown report(s): ' + ', '.join(unknown),
+                        'available': list(REPORT_FILES)}), 400
+
+    parts = []
+    etags = []
+    found = False
+    labels = _want_labels()
+    for slug in dict.fromkeys(slugs):
+        body, etag = _report_fragment(REPORT_FILES[slug], labels)
+        found = found or body is not None
+        parts.append(b'"' + slug.encode('ascii') + b'":' + (body if body is not None else b'null'))
+        etags.append(slug + '=' + (etag or '-'))
+    if not found:
         return jsonify({'error': 'report not found'}), 404
-    return jsonify(data)
+
+    combined = hashlib.sha1(';'.join(etags).encode('ascii')).hexdigest()[:16]
+    return _json_bytes_response(b'{' + b','.join(parts) + b'}', combined)
+
+
+@app.route('/api/codes', methods=['GET'])
+def api_codes():
+    """Code -> label lists from the data guide.
+
+    Query: optional `fields` (comma-separated field names, e.g.
+    `light_conditions,police_force`); all fields when omitted.
+    Body: `{"version": ..., "fields": {"<field>": {"<code>": "<label>"}}}`.
+    """
+    if codebook is None:
+        return jsonify({'error': 'code lists not found; run scripts/compile_codes.py'}), 404
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    unknown = [f for f in fields if f not in codebook.fields]
+    if unknown:
+        return jsonify({'error': 'unknown field(s): ' + ', '.join(unknown)}), 404
+    body, etag = codebook.body(sorted(set(fields)) or None)
+    return _json_bytes_response(body, etag)
+
+
+@app.route('/api/codes/<field>', methods=['GET'])
+def api_codes_field(field):
+    """Codes of one field, or with `?code=` the label of a single code."""
+    if codebook is None:
+        return jsonify({'error': 'code lists not found; run scripts/compile_codes.py'}), 404
+    if field not in codebook.fields:
+        return jsonify({'error': 'unknown field: ' + field}), 404
+    code = request.args.get('code')
+    if code is None:
+        return jsonify({'field': field, 'tables': codebook.tables.get(field, []), 'codes': codebook.fields[field]})
+    label = codebook.label(field, code)
+    if label is None:
+        return jsonify({'error': 'unknown code {} for {}'.format(code, field)}), 404
+    return jsonify({'field': field, 'code': code, 'label': label})
+
+
+INCIDENTS_WAL_PATH = os.path.join(os.path.dirname(__file__), 'data', 'incidents.wal')
+# Upper bound on incidents accepted by one POST /api/incidents call
+INCIDENTS_MAX_BATCH = 1000
+# Seconds between SSE keep-alive comments on /api/incidents/stream
+SSE_HEARTBEAT_SECONDS = 15
+
+# Seconds between checks of the WAL for incidents ingested by other workers
+INCIDENTS_FOLLOW_SECONDS = float(os.environ.get('DRIVESMART_INCIDENTS_FOLLOW', '0.5'))
+
+live_incidents = LiveAggregates(REPORTS_DIR, INCIDENTS_WAL_PATH,
+                                fsync=os.environ.get('DRIVESMART_WAL_FSYNC') == '1',
+                                data_dir=DATA_DIR, follow_seconds=INCIDENTS_FOLLOW_SECONDS)
+
+
+@app.route('/api/incidents', methods=['POST'])
+def api_incidents_ingest():
+    """Ingest one accident record (JSON object) or a list of them.
+
+    Records are appended to `backend/data/incidents.wal` and folded into the
+    live aggregates; connected /api/incidents/stream clients get the deltas.
+    """
+    if not _admin_allowed():
+        return jsonify({'error': 'forbidden'}), 403
+    payload = request.get_json(silent=True)
+    records = payload if isinstance(payload, list) else [payload]
+    if not payload or len(records) > INCIDENTS_MAX_BATCH:
+        return jsonify({'error': 'send 1-{} incident objects'.format(INCIDENTS_MAX_BATCH)}), 400
+    try:
+        incidents = [normalize_incident(r) for r in records]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    deltas = live_incidents.ingest(incidents)
+    return jsonify({'ingested': len(incidents), 'deltas': deltas}), 201
+
+
+@app.route('/api/incidents/live', methods=['GET'])
+def api_incidents_live():
+    """Current live aggregates: report baselines plus every ingested incident."""
+    return jsonify(live_incidents.snapshot())
+
+
+@app.route('/api/incidents/stream', methods=['GET'])
+def api_incidents_stream():
+    """Server-Sent Events: one `delta` event per ingested incident.
+
+    Each delta carries the new totals for the severity, month, hotspot cell
+    and police force the incident touched. Clients load /api/incidents/live
+    once and then apply deltas.
+    """
+    import json
+    q = live_incidents.subscribe()
+
+    def events():
+        try:
+            yield 'retry: 3000\n\n'
+            while live_incidents.is_subscribed(q):
+                try:
+                    delta = q.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield 'event: delta\ndata: ' + json.dumps(delta, separators=(',', ':')) + '\n\n'
+        finally:
+            live_incidents.unsubscribe(q)
+
+    resp = Response(events(), mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
 
 
 @app.route('/api/reports', methods=['GET'])
@@ -260,8 +1386,14 @@ def reports_list():
                 'name': 'Severity Distribution',
                 'description': 'Breakdown by severity level',
                 'endpoint': '/api/reports/severity-distribution'
+            },
+            {
+                'name': 'Emerging Hotspots',
+                'description': 'Locations with significant recent increases',
+                'endpoint': '/api/reports/emerging-hotspots'
             }
-        ]
+        ],
+        'bundle': '/api/reports/bundle?include=' + ','.join(REPORT_FILES)
     })
 
 
@@ -0,0 +1,163 @@
+"""Route risk scoring against the accident hotspot cells.
+
+Routes are resampled at a fixed spacing and every sample is matched against
+a KD-tree of hotspot cells built from the pipeline outputs
+(accidents_hotspots.geojson for density, hotspot_analysis_report.json for
+the severity mix). All routes in a request are scored with one tree query
+and numpy reductions.
+"""
+import json
+import os
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+# Relative harm of one incident by severity, used to weight hotspot density
+SEVERITY_WEIGHTS = {'fatal': 10.0, 'severe': 3.0, 'slight': 1.0}
+
+# Gaussian kernel bandwidth around each hotspot cell, and the search cutoff
+BANDWIDTH_M = 100.0
+CUTOFF_M = 3 * BANDWIDTH_M
+
+
+def decode_polyline(encoded):
+    """Decode a Google encoded polyline into an (n, 2) array of lat/lng."""
+    b = np.frombuffer(encoded.encode('ascii'), dtype=np.uint8).astype(np.int64) - 63
+    if b.size == 0:
+        return np.empty((0, 2))
+    ends = (b & 0x20) == 0
+    if not ends[-1]:
+        raise ValueError('truncated polyline')
+    group = np.concatenate(([0], np.cumsum(ends)[:-1]))
+    starts = np.flatnonzero(np.concatenate(([True], ends[:-1])))
+    shift = 5 * (np.arange(b.size) - starts[group])
+    values = np.bincount(group, weights=(b & 0x1f) << shift).astype(np.int64)
+    values = (values >> 1) ^ -(values & 1)
+    if values.size % 2:
+        raise ValueError('polyline has an odd number of values')
+    return np.cumsum(values.reshape(-1, 2), axis=0) / 1e5
+
+
+class HotspotIndex:
+    """KD-tree over hotspot cells projected to metres, with per-cell weights."""
+
+    def __init__(self, lat, lng, weight):
+        from scipy.spatial import cKDTree
+        self.lat0 = float(np.mean(lat)) if len(lat) else 54.0
+        self.lat = np.asarray(lat, dtype=float)
+        self.lng = np.asarray(lng, dtype=float)
+        self.weight = np.asarray(weight, dtype=float)
+        self.tree = cKDTree(self.project(np.column_stack([self.lat, self.lng])))
+
+    def project(self, latlng):
+        """Equirectangular projection around the index's mean latitude."""
+        rad = np.radians(latlng)
+        return np.column_stack([
+            EARTH_RADIUS_M * rad[:, 1] * np.cos(np.radians(self.lat0)),
+            EARTH_RADIUS_M * rad[:, 0],
+        ])
+
+    @classmethod
+    def from_data_dir(cls, data_dir):
+        """Build the index from the pipeline outputs in backend/data.
+
+        Cell weight = incident count x mean severity weight. Cells that only
+        appear in the GeoJSON use the overall severity mix.
+        """
+        cells = {}
+        try:
+            with open(os.path.join(data_dir, 'accidents_hotspots.geojson'), 'r', encoding='utf-8') as f:
+                for feat in json.load(f).get('features', []):
+                    lng, lat = feat['geometry']['coordinates'][:2]
+                    cells[(round(lat, 3), round(lng, 3))] = [float(feat['properties'].get('count', 0)), None]
+        except Exception:
+            pass
+        try:
+            with open(os.path.join(data_dir, 'reports', 'hotspot_analysis_report.json'), 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except Exception:
+            report = {}
+        mix_total = {k: 0 for k in SEVERITY_WEIGHTS}
+        for h in report.get('top_hotspots', []):
+            sb = h.get('severity_breakdown', {})
+            n = sum(sb.get(k, 0) for k in SEVERITY_WEIGHTS)
+            for k in SEVERITY_WEIGHTS:
+                mix_total[k] += sb.get(k, 0)
+            if n:
+                factor = sum(SEVERITY_WEIGHTS[k] * sb.get(k, 0) for k in SEVERITY_WEIGHTS) / n
+                key = (round(h['lat'], 3), round(h['lng'], 3))
+                count = max(float(h.get('incidents', 0)), cells.get(key, [0])[0])
+                cells[key] = [count, factor]
+
+        n = sum(mix_total.values())
+        default = (sum(SEVERITY_WEIGHTS[k] * mix_total[k] for k in SEVERITY_WEIGHTS) / n) if n else 1.0
+        if not cells:
+            return None
+        keys = list(cells)
+        lat = np.array([k[0] for k in keys])
+        lng = np.array([k[1] for k in keys])
+        weight = np.array([c * (f if f is not None else default) for c, f in cells.values()])
+        return cls(lat, lng, weight)
+
+    def score_routes(self, routes, spacing_m):
+        """Score a list of (n_i, 2) lat/lng arrays.
+
+        Returns one dict per route with `total_risk`, `risk_per_km`,
+        `length_m` and `segments` (one entry per consecutive vertex pair).
+        """
+        samples, seg_ids, route_bounds, seg_lengths = [], [], [0], []
+        seg_offset = 0
+        for path in routes:
+            xy = self.project(path)
+            seg_len = np.hypot(*np.diff(xy, axis=0).T)
+            cum = np.concatenate(([0.0], np.cumsum(seg_len)))
+            # Sample midpoints of fixed-length steps so each sample covers spacing_m
+            dist = np.arange(spacing_m / 2, cum[-1], spacing_m)
+            if dist.size == 0:
+                dist = np.array([cum[-1] / 2])
+            samples.append(np.column_stack([np.interp(dist, cum, xy[:, 0]), np.interp(dist, cum, xy[:, 1])]))
+            seg = np.clip(np.searchsorted(cum, dist, side='right') - 1, 0, max(len(seg_len) - 1, 0))
+            seg_ids.append(seg + seg_offset)
+            seg_offset += max(len(seg_len), 1)
+            seg_lengths.append(seg_len if len(seg_len) else np.zeros(1))
+            route_bounds.append(seg_offset)
+
+        pts = np.vstack(samples)
+        seg_of_sample = np.concatenate(seg_ids)
+        # Sparse (sample, cell) pairs within the cutoff, then kernel-weighted sums
+        from scipy.spatial import cKDTree
+        pairs = self.tree.sparse_distance_matrix(cKDTree(pts), CUTOFF_M, output_type='ndarray')
+        sample_risk = np.zeros(len(pts))
+        if len(pairs):
+            kernel = np.exp(-0.5 * (pairs['v'] / BANDWIDTH_M) ** 2)
+            np.add.at(sample_risk, pairs['j'], self.weight[pairs['i']] * kernel)
+        # Each sample stands for spacing_m of road; risk is per kilometre travelled
+        sample_risk *= spacing_m / 1000.0
+        seg_risk = np.bincount(seg_of_sample, weights=sample_risk, minlength=seg_offset)
+        seg_max = np.zeros(seg_offset)
+        np.maximum.at(seg_max, seg_of_sample, sample_risk)
+
+        results = []
+        for r, path in enumerate(routes):
+            lo, hi = route_bounds[r], route_bounds[r + 1]
+            lengths = seg_lengths[r]
+            total = float(seg_risk[lo:hi].sum())
+            length = float(lengths.sum())
+            results.append({
+                'total_risk': round(total, 4),
+                'risk_per_km': round(total / (length / 1000.0), 4) if length else 0.0,
+                'length_m': round(length, 1),
+                'segments': [
+                    {
+                        'start': [float(path[i][0]), float(path[i][1])],
+                        'end': [float(path[min(i + 1, len(path) - 1)][0]), float(path[min(i + 1, len(path) - 1)][1])],
+                        'length_m': round(float(lengths[i]), 1),
+                        'risk': round(float(seg_risk[lo + i]), 4),
+                        'peak_risk': round(float(seg_max[lo + i]), 4),
+                    }
+                    for i in range(hi - lo)
+                ],
+            })
+        return results
+
@@ -0,0 +1,109 @@
+"""Date-range trends from the daily prefix-sum index (daily_index.npz).
+
+The pipeline stores, for every calendar day between the first and last
+accident, running totals of incidents, casualties and severity counts.
+Totals for any range are the difference of two rows, and a resampled series
+is one difference per bucket, so queries never touch raw accident rows.
+"""
+import numpy as np
+
+SEVERITY_KEYS = ('fatal', 'severe', 'slight')
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year', 'total')
+MAX_BUCKETS = 5000
+# Shortest bucket of each granularity in days, to reject huge series up front
+_MIN_DAYS = {'day': 1, 'week': 7, 'month': 28, 'quarter': 89, 'year': 365}
+
+
+def parse_day(value):
+    """Parse YYYY-MM-DD into numpy datetime64[D]; raises ValueError."""
+    try:
+        return np.datetime64(str(value), 'D')
+    except ValueError:
+        raise ValueError('dates must be YYYY-MM-DD')
+
+
+def _bucket_starts(first, end, granularity):
+    """Start day of every bucket overlapping [first, end), first clipped to `first`."""
+    if granularity == 'day':
+        return np.arange(first, end, dtype='datetime64[D]')
+    if granularity == 'week':
+        # ISO weeks: 1970-01-01 was a Thursday, so Monday = (days + 3) % 7 == 0
+        monday = first - (first.astype(np.int64) + 3) % 7
+        starts = np.arange(monday, end, 7, dtype='datetime64[D]')
+    elif granularity in ('month', 'quarter'):
+        months = np.arange(first.astype('datetime64[M]'), (end - 1).astype('datetime64[M]') + 1)
+        if granularity == 'quarter':
+            months = np.unique(months - months.astype(np.int64) % 3)
+        starts = months.astype('datetime64[D]')
+    elif granularity == 'year':
+        starts = np.arange(first.astype('datetime64[Y]'), (end - 1).astype('datetime64[Y]') + 1).astype('datetime64[D]')
+    else:
+        starts = np.array([first], dtype='datetime64[D]')
+    starts = starts.copy()
+    starts[0] = first
+    return starts
+
+
+class DailyIndex:
+    """Prefix sums over days starting at `start` (row i = totals before day i)."""
+
+    def __init__(self, path):
+        with np.load(path) as npz:
+            self.start = npz['start'].astype('datetime64[D]')
+            self.cum_incidents = npz['cum_incidents']
+            self.cum_casualties = npz['cum_casualties']
+            self.cum_severity = npz['cum_severity']
+        self.days = len(self.cum_incidents) - 1
+        self.end = self.start + self.days  # exclusive
+
+    def coverage(self):
+        return {'from': str(self.start), 'to': str(self.end - 1)}
+
+    def _rows(self, days):
+        # Days outside the index contribute nothing: clamp to its ends
+        return np.clip((days - self.start).astype(np.int64), 0, self.days)
+
+    def series(self, first, last, granularity):
+        """Buckets for the inclusive day range [first, last].
+
+        Returns a dict of arrays: `start`, `end` (inclusive), `incidents`,
+        `casualties` and `severity` (n x 3, in SEVERITY_KEYS order).
+        """
+        end = last + 1
+        span = int((end - first).astype(np.int64))
+        if granularity in _MIN_DAYS and span // _MIN_DAYS[granularity] > MAX_BUCKETS:
+            raise ValueError('too many buckets (max {}); use a coarser granularity'.format(MAX_BUCKETS))
+        starts = _bucket_starts(first, end, granularity)
+        bounds = np.append(starts, end)
+        rows = self._rows(bounds)
+        return {
+            'start': starts,
+            'end': bounds[1:] - 1,
+            'incidents': np.diff(self.cum_incidents[rows]),
+            'casualties': np.diff(self.cum_casualties[rows]),
+            'severity': np.diff(self.cum_severity[rows], axis=0),
+        }
+
+    def totals(self, first, last):
+        a, b = self._rows(np.array([first, last + 1]))
+        return self._bucket_dict(first, last, self.cum_incidents[b] - self.cum_incidents[a],
+                                 self.cum_casualties[b] - self.cum_casualties[a],
+                                 self.cum_severity[b] - self.cum_severity[a])
+
+    @staticmethod
+    def _bucket_dict(start, end, incidents, casualties, severity):
+        return {
+            'from': str(start),
+            'to': str(end),
+            'incidents': int(incidents),
+            'casualties': int(casualties),
+            'severity_breakdown': dict(zip(SEVERITY_KEYS, (int(v) for v in severity))),
+        }
+
+    def trends(self, first, last, granularity):
+        """JSON-ready series plus range totals for [first, last]."""
+        s = self.series(first, last, granularity)
+        starts, ends = s['start'].astype(str).tolist(), s['end'].astype(str).tolist()
+        buckets = [self._bucket_dict(*row) for row in zip(starts, ends, s['incidents'].tolist(),
+                                                         s['casualties'].tolist(), s['severity'].tolist())]
+        return {'buckets': buckets, 'totals': self.totals(first, last)}
@@ -481,19 +481,18 @@ const DriveSmart = () => {
       async function load() {
         setLoadingAnalytics(true);
         try {
-          const [trendsRes, riskRes, severityRes] = await Promise.all([
-            axios.get(`${BASE_API}/api/reports/monthly-trends`),
-            axios.get(`${BASE_API}/api/reports/risk-factors`),
-            axios.get(`${BASE_API}/api/reports/severity-distribution`),
-          ]);
+          const bundleRes = await axios.get(`${BASE_API}/api/reports/bundle`, {
+            params: { include: 'monthly-trends,risk-factors,severity-distribution' },
+          });
+          const bundle = bundleRes.data || {};
           // normalize monthly trends into months/counts
-          const trendsRaw = trendsRes.data || {};
+          const trendsRaw = bundle['monthly-trends'] || {};
           const trendsArray = trendsRaw.trends || [];
           const months = trendsArray.map((t) => t.month);
           const counts = trendsArray.map((t) => t.incidents);
 
           // normalize risk factors - aggregate by category only
-          const riskRaw = riskRes.data || {};
+          const riskRaw = bundle['risk-factors'] || {};
           const factors = riskRaw.factors || {};
 
           const topFactors = [];
@@ -508,7 +507,7 @@ const DriveSmart = () => {
           });
 
           // severity normalize
-          const sevRaw = severityRes.data || {};
+          const sevRaw = bundle['severity-distribution'] || {};
           const distribution = (sevRaw.distribution || []).map((d) => ({ label: d.severity_level, count: d.count, pct: d.percentage }));
           const totalIncidents = sevRaw.total_incidents || 0;
 
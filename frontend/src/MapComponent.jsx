@@ -1,10 +1,11 @@
 import React, { useEffect, useRef, useState } from 'react';
-import axios from 'axios';
+
+const TILE_BASE = 'http://localhost:4000/api/tiles/heatmap';
 
 const MapComponent = ({ className = '', gmapsApiKey, gmapsScriptLoaded }) => {
   const ref = useRef(null);
   const [loading, setLoading] = useState(true);
-  const [currentLocation, setCurrentLocation] = useState({ lat: 53.0, lng: 1.0 }); // Default to a general UK location
+  const [currentLocation] = useState({ lat: 53.0, lng: 1.0 }); // Default to a general UK location
 
   const fetchMapDataAndInitMap = async () => {
     setLoading(true);
@@ -17,30 +18,21 @@ const MapComponent = ({ className = '', gmapsApiKey, gmapsScriptLoaded }) => {
     }
 
     try {
-      const resp = await axios.get('http://localhost:4000/api/mapdata');
-      const { locations } = resp.data;
-
-      if (!locations || !locations.length) {
-        console.warn('No heatmap locations received from backend');
-        setLoading(false);
-        return;
-      }
-
-      const newCenter = { lat: locations[0].lat, lng: locations[0].lng };
-      setCurrentLocation(newCenter);
-
       map = new window.google.maps.Map(ref.current, {
-        center: newCenter,
+        center: currentLocation,
         zoom: 6,
       });
 
-      const points = (locations || []).map((p) => new window.google.maps.LatLng(p.lat, p.lng));
-
-      heatmap = new window.google.maps.visualization.HeatmapLayer({
-        data: points,
-        dissipating: true,
-        map: map,
+      // Density tiles are rendered and cached by the backend, so the browser
+      // cost no longer grows with the number of accident points.
+      heatmap = new window.google.maps.ImageMapType({
+        getTileUrl: (coord, zoom) => `${TILE_BASE}/${zoom}/${coord.x}/${coord.y}.png`,
+        tileSize: new window.google.maps.Size(256, 256),
+        maxZoom: 18,
+        opacity: 0.8,
+        name: 'Accident heatmap',
       });
+      map.overlayMapTypes.push(heatmap);
 
       setLoading(false);
     } catch (e) {
@@ -23,13 +23,14 @@ ChartJS.register(
 )
 
 const BASE = 'http://localhost:4000'
-const endpointMap = {
-  monthlySafety: `${BASE}/api/reports/monthly-safety`,
-  hotspotAnalysis: `${BASE}/api/reports/hotspot-analysis`,
-  emergencyResponse: `${BASE}/api/reports/emergency-response`,
-  monthlyTrends: `${BASE}/api/reports/monthly-trends`,
-  riskFactors: `${BASE}/api/reports/risk-factors`,
-  severityDistribution: `${BASE}/api/reports/severity-distribution`,
+// state key -> report slug served by /api/reports/bundle
+const reportSlugs = {
+  monthlySafety: 'monthly-safety',
+  hotspotAnalysis: 'hotspot-analysis',
+  emergencyResponse: 'emergency-response',
+  monthlyTrends: 'monthly-trends',
+  riskFactors: 'risk-factors',
+  severityDistribution: 'severity-distribution',
 }
 
 export default function ReportsDashboard() {
@@ -41,11 +42,11 @@ export default function ReportsDashboard() {
     async function fetchAll() {
       setLoading(true)
       try {
-        const keys = Object.keys(endpointMap)
-        const promises = keys.map((k) => axios.get(endpointMap[k]))
-        const results = await Promise.all(promises)
+        const keys = Object.keys(reportSlugs)
+        const include = keys.map((k) => reportSlugs[k]).join(',')
+        const resp = await axios.get(`${BASE}/api/reports/bundle`, { params: { include } })
         const data = {}
-        keys.forEach((k, i) => (data[k] = results[i].data))
+        keys.forEach((k) => (data[k] = resp.data[reportSlugs[k]]))
         setReports(data)
       } catch (err) {
         setError(err.message || 'Failed to load reports')
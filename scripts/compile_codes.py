@@ -0,0 +1,83 @@
+"""
+compile_codes.py
+Compile the code list in backend/data/dataset-data-guide.xlsx into a
+compact code -> label lookup (backend/data/codes.json) that the backend
+loads once at startup, so it never has to parse the spreadsheet.
+
+Output layout:
+  {"source": ..., "source_sha1": ...,
+   "fields": {"<field name>": {"<code>": "<label>", ...}, ...},
+   "tables": {"<field name>": ["collision", ...], ...}}
+
+Codes are stored as strings ("1", "-1", "E06000001"); descriptive rows
+such as formats ("(DD/MM/YYYY)") or ranges ("1 to 9999") are skipped.
+Fields with the same name in several tables share one entry.
+
+Run: python scripts/compile_codes.py
+
+Requirements: openpyxl
+"""
+import os, sys, json, hashlib
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+GUIDE_PATH = os.path.join(ROOT, 'backend', 'data', 'dataset-data-guide.xlsx')
+OUT_PATH = os.path.join(ROOT, 'backend', 'data', 'codes.json')
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+# Same normalization as the runtime CodeBook lookups
+from codes import code_key
+
+
+def compile_guide(path):
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True)
+    ws = wb.worksheets[0]
+    rows = ws.iter_rows(values_only=True)
+    header = [str(h).strip().lower() for h in next(rows)]
+    col = {name: header.index(name) for name in ('table', 'field name', 'code/format', 'label')}
+
+    fields, tables = {}, {}
+    for row in rows:
+        table, field = row[col['table']], row[col['field name']]
+        code, label = row[col['code/format']], row[col['label']]
+        if not field:
+            continue
+        field = str(field).strip()
+        tables.setdefault(field, [])
+        if table and table not in tables[field]:
+            tables[field].append(str(table).strip())
+        if code is None or label is None:
+            continue
+        key = code_key(code)
+        if not key or any(ch.isspace() for ch in key):
+            continue
+        labels = fields.setdefault(field, {})
+        label = ' '.join(str(label).split())
+        if labels.get(key, label) != label:
+            print('Warning: {} code {} is "{}" and "{}"; keeping the first'.format(field, key, labels[key], label))
+            continue
+        labels.setdefault(key, label)
+    wb.close()
+    return fields, {f: t for f, t in tables.items() if f in fields}
+
+
+def main():
+    fields, tables = compile_guide(GUIDE_PATH)
+    with open(GUIDE_PATH, 'rb') as f:
+        sha = hashlib.sha1(f.read()).hexdigest()
+    out = {
+        'source': os.path.basename(GUIDE_PATH),
+        'source_sha1': sha,
+        'fields': fields,
+        'tables': tables,
+    }
+    tmp = OUT_PATH + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(out, f, separators=(',', ':'), ensure_ascii=False, sort_keys=True)
+    os.replace(tmp, OUT_PATH)
+    print('Wrote {} fields, {} codes to {} ({:.1f} KB)'.format(
+        len(fields), sum(len(v) for v in fields.values()), OUT_PATH, os.path.getsize(OUT_PATH) / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,30 +1,40 @@
+import os
 import json
 from datetime import datetime
 
-INPUT = r"d:/4-1/ROAD-ACCIDENTS-PREDICTION-AND-CLASSIFICATION-master/backend/data/reports/monthly_safety_report.json"
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+INPUT = os.path.join(ROOT, 'backend', 'data', 'reports', 'monthly_safety_report.json')
 
-with open(INPUT,'r',encoding='utf-8') as f:
-    data = json.load(f)
 
-for m in data.get('trends',[]):
-    try:
-        dt = datetime.strptime(m['month'],'%Y-%m')
-        m['month_name'] = dt.strftime('%b %Y')
-    except Exception:
-        m['month_name'] = m.get('month')
-
-# update statistics peaks too
-stats = data.get('statistics',{})
-for key in ['peak_month','highest_casualty_month']:
-    val = stats.get(key)
-    if val:
+def add_month_names(data):
+    """Add `month_name` to each trend and `<key>_name` to the peak statistics."""
+    for m in data.get('trends',[]):
         try:
-            dt = datetime.strptime(val,'%Y-%m')
-            stats[key+'_name'] = dt.strftime('%b %Y')
+            dt = datetime.strptime(m['month'],'%Y-%m')
+            m['month_name'] = dt.strftime('%b %Y')
         except Exception:
-            stats[key+'_name'] = val
+            m['month_name'] = m.get('month')
+
+    # update statistics peaks too
+    stats = data.get('statistics',{})
+    for key in ['peak_month','highest_casualty_month']:
+        val = stats.get(key)
+        if val:
+            try:
+                dt = datetime.strptime(val,'%Y-%m')
+                stats[key+'_name'] = dt.strftime('%b %Y')
+            except Exception:
+                stats[key+'_name'] = val
+    return data
+
+
+if __name__ == '__main__':
+    # generate_reports.py applies this as part of its build; running it
+    # directly updates an existing report in place.
+    with open(INPUT,'r',encoding='utf-8') as f:
+        data = json.load(f)
 
-with open(INPUT,'w',encoding='utf-8') as f:
-    json.dump(data,f,indent=2)
+    with open(INPUT,'w',encoding='utf-8') as f:
+        json.dump(add_month_names(data),f,indent=2)
 
-print('Updated month_name for trends and statistics.')
+    print('Updated month_name for trends and statistics.')
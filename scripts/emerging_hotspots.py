@@ -0,0 +1,65 @@
+"""
+emerging_hotspots.py
+Flag location cells whose incidents rose significantly faster than the
+network between a baseline and a recent period, using the month x cell
+counts written by process_accidents.py (see backend/emerging.py).
+
+Output: backend/data/reports/emerging_hotspots.json
+
+Run:
+  python scripts/emerging_hotspots.py                  # last 3 months vs all earlier months
+  python scripts/emerging_hotspots.py --recent 6 --baseline 12 --alpha 0.01
+
+Requirements: numpy, scipy
+"""
+import os, sys, json, time, argparse
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+DATA_DIR = os.path.join(ROOT, 'backend', 'data')
+IN_PATH = os.path.join(DATA_DIR, 'monthly_cells.npz')
+OUT_PATH = os.path.join(DATA_DIR, 'reports', 'emerging_hotspots.json')
+
+from emerging import RADIUS_M, MonthCellCounts, detect
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Detect emerging accident hotspots')
+    parser.add_argument('--recent', type=int, default=3, help='months in the recent window')
+    parser.add_argument('--baseline', type=int, default=None, help='months in the baseline window (default: all earlier)')
+    parser.add_argument('--alpha', type=float, default=0.05, help='false discovery rate')
+    parser.add_argument('--min-recent', type=int, default=3)
+    parser.add_argument('--radius-m', type=float, default=RADIUS_M, help='Getis-Ord neighbourhood radius')
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(IN_PATH):
+        print('No month x cell counts found; run scripts/process_accidents.py first')
+        sys.exit(1)
+    start = time.time()
+    data = MonthCellCounts(IN_PATH)
+    result = detect(data, recent=args.recent, baseline=args.baseline, alpha=args.alpha,
+                    min_recent=args.min_recent, radius_m=args.radius_m, limit=args.limit)
+    report = {
+        'report_title': 'Emerging Hotspots: Locations with Significant Recent Increases',
+        'generated_date': datetime.now().isoformat(),
+    }
+    report.update(result)
+    report['recommendations'] = [
+        'Review emerging locations for recent changes (roadworks, new junction layouts, signal timing)',
+        'Prioritise locations with a high Gi* z-score, where neighbouring cells are rising too',
+        'Re-run after each monthly data load to confirm or clear flagged locations',
+    ]
+    os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
+    tmp = OUT_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, OUT_PATH)
+    print('{} of {} tested cells emerging ({} vs {}), {:.1f}s -> {}'.format(
+        result['emerging_count'], result['cells_tested'], result['recent_window']['from'],
+        result['baseline_window']['from'], time.time() - start, OUT_PATH))
+
+
+if __name__ == '__main__':
+    main()
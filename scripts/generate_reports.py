@@ -9,18 +9,28 @@ Produces:
   5. risk_factors_analysis.json - top contributing factors
   6. severity_distribution.json - breakdown by severity level
 
-Run: python scripts/generate_reports.py
+Generation is a small dependency graph (see NODES): the CSV feeds a typed
+`frame`, the frame feeds a shared `monthly` aggregate and the reports, and
+post-processing steps (month names) run on report outputs. Each node's key
+is a hash of its code and its dependencies' keys, with the CSV keyed by its
+content hash. Nodes whose key matches the last build are skipped;
+the rest run in parallel across processes as soon as their dependencies
+are done. Intermediate artifacts live in backend/data/reports/.build/.
+
+Run: python scripts/generate_reports.py [--force] [--jobs N]
 """
-import os, json, sys
-from collections import defaultdict, Counter
+import os, json, sys, time, hashlib, inspect, argparse
 from datetime import datetime
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 CSV_PATH = os.path.join(ROOT, 'backend', 'data', 'accidents.csv')
 OUT_DIR = os.path.join(ROOT, 'backend', 'data', 'reports')
-os.makedirs(OUT_DIR, exist_ok=True)
+BUILD_DIR = os.path.join(OUT_DIR, '.build')
+MANIFEST_PATH = os.path.join(BUILD_DIR, 'manifest.json')
+
+# Bump to invalidate every node (e.g. after changing shared helpers below)
+CODE_VERSION = 1
 
-print('Reading', CSV_PATH)
 try:
     import pandas as pd
     import numpy as np
@@ -28,247 +38,405 @@ except Exception as e:
     print('ERROR: pandas and numpy required. Install with: pip install pandas numpy')
     sys.exit(1)
 
-# Read CSV with proper parsing
-df = pd.read_csv(CSV_PATH, parse_dates=['date'], dayfirst=True, low_memory=False)
-print(f'Loaded {len(df)} accident records')
 
-# Clean up data types
-df['number_of_casualties'] = pd.to_numeric(df['number_of_casualties'], errors='coerce').fillna(0).astype(int)
-df['collision_severity'] = pd.to_numeric(df['collision_severity'], errors='coerce')
-df['did_police_officer_attend_scene_of_accident'] = pd.to_numeric(df['did_police_officer_attend_scene_of_accident'], errors='coerce').fillna(0)
+def _out(name):
+    return os.path.join(OUT_DIR, name)
+
+
+def _build(name):
+    return os.path.join(BUILD_DIR, name)
+
+
+def _write_json(path, data):
+    """Write JSON atomically so the backend never serves a half-written file."""
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _severity_breakdown(sb):
+    return {
+        'fatal': int(sb.get(1.0, 0)),
+        'severe': int(sb.get(2.0, 0)),
+        'slight': int(sb.get(3.0, 0))
+    }
+
+
+# ============================================================================
+# SHARED AGGREGATES
+# ============================================================================
+def build_frame(outputs):
+    """Parse the CSV once into a typed frame shared by every report."""
+    print('Reading', CSV_PATH)
+    # Read CSV with proper parsing
+    df = pd.read_csv(CSV_PATH, parse_dates=['date'], dayfirst=True, low_memory=False)
+    print(f'Loaded {len(df)} accident records')
+
+    # Clean up data types
+    df['number_of_casualties'] = pd.to_numeric(df['number_of_casualties'], errors='coerce').fillna(0).astype(int)
+    df['collision_severity'] = pd.to_numeric(df['collision_severity'], errors='coerce')
+    df['did_police_officer_attend_scene_of_accident'] = pd.to_numeric(df['did_police_officer_attend_scene_of_accident'], errors='coerce').fillna(0)
+    df['year_month'] = df['date'].dt.strftime('%Y-%m')
+
+    columns = ['date', 'year_month', 'latitude', 'longitude', 'collision_severity', 'number_of_casualties',
+               'police_force', 'did_police_officer_attend_scene_of_accident', 'light_conditions',
+               'weather_conditions', 'road_surface_conditions', 'special_conditions_at_site']
+    df[columns].to_pickle(outputs[0])
+
+
+def build_monthly(outputs, frame):
+    """Per-month incidents, casualties and severity breakdown."""
+    df = pd.read_pickle(frame)
+
+    # Use vectorized operations instead of iterrow
+    monthly_agg = df.groupby('year_month').agg({
+        'collision_severity': 'count',
+        'number_of_casualties': 'sum'
+    }).rename(columns={'collision_severity': 'count'})
+
+    # Get severity breakdown per month
+    severity_breakdown = df.groupby(['year_month', 'collision_severity']).size().unstack(fill_value=0)
+
+    monthly_trends = []
+    for month in sorted(monthly_agg.index):
+        data = monthly_agg.loc[month]
+        sb = severity_breakdown.loc[month].to_dict() if month in severity_breakdown.index else {}
+        monthly_trends.append({
+            'month': month,
+            'incidents': int(data['count']),
+            'casualties': int(data['number_of_casualties']),
+            'severity_breakdown': _severity_breakdown(sb)
+        })
+    _write_json(outputs[0], monthly_trends)
+
 
 # ============================================================================
 # 1. MONTHLY SAFETY REPORT
 # ============================================================================
-df['year_month'] = df['date'].dt.strftime('%Y-%m')
-
-# Use vectorized operations instead of iterrow
-monthly_agg = df.groupby('year_month').agg({
-    'collision_severity': 'count',
-    'number_of_casualties': 'sum'
-}).rename(columns={'collision_severity': 'count'})
-
-# Get severity breakdown per month
-severity_breakdown = df.groupby(['year_month', 'collision_severity']).size().unstack(fill_value=0)
-
-monthly_trends = []
-for month in sorted(monthly_agg.index):
-    data = monthly_agg.loc[month]
-    sb = severity_breakdown.loc[month].to_dict() if month in severity_breakdown.index else {}
-    monthly_trends.append({
-        'month': month,
-        'incidents': int(data['count']),
-        'casualties': int(data['number_of_casualties']),
-        'severity_breakdown': {
-            'fatal': int(sb.get(1.0, 0)),
-            'severe': int(sb.get(2.0, 0)),
-            'slight': int(sb.get(3.0, 0))
+def build_monthly_safety(outputs, frame, monthly):
+    df = pd.read_pickle(frame)
+    monthly_trends = _read_json(monthly)
+
+    safety_report = {
+        'report_title': 'Monthly Safety Report: Comprehensive Analysis of Accident Trends',
+        'generated_date': datetime.now().isoformat(),
+        'total_incidents': len(df),
+        'total_casualties': int(df['number_of_casualties'].sum()),
+        'total_months_covered': len(monthly_trends),
+        'trends': monthly_trends,
+        'statistics': {
+            'avg_incidents_per_month': round(len(df) / max(len(monthly_trends), 1), 2),
+            'avg_casualties_per_incident': round(float(df['number_of_casualties'].mean()), 2),
+            'peak_month': max([(t['month'], t['incidents']) for t in monthly_trends], key=lambda x: x[1])[0] if monthly_trends else None,
+            'highest_casualty_month': max([(t['month'], t['casualties']) for t in monthly_trends], key=lambda x: x[1])[0] if monthly_trends else None
         }
-    })
-
-
-safety_report = {
-    'report_title': 'Monthly Safety Report: Comprehensive Analysis of Accident Trends',
-    'generated_date': datetime.now().isoformat(),
-    'total_incidents': len(df),
-    'total_casualties': int(df['number_of_casualties'].sum()),
-    'total_months_covered': len(monthly_trends),
-    'trends': monthly_trends,
-    'statistics': {
-        'avg_incidents_per_month': round(len(df) / max(len(monthly_trends), 1), 2),
-        'avg_casualties_per_incident': round(float(df['number_of_casualties'].mean()), 2),
-        'peak_month': max([(t['month'], t['incidents']) for t in monthly_trends], key=lambda x: x[1])[0] if monthly_trends else None,
-        'highest_casualty_month': max([(t['month'], t['casualties']) for t in monthly_trends], key=lambda x: x[1])[0] if monthly_trends else None
     }
-}
+    _write_json(outputs[0], safety_report)
+
+
+def build_month_names(outputs, monthly_safety):
+    """Post-process the safety report with readable month names."""
+    from convert_month_names import add_month_names
+    _write_json(outputs[0], add_month_names(_read_json(monthly_safety)))
 
-with open(os.path.join(OUT_DIR, 'monthly_safety_report.json'), 'w') as f:
-    json.dump(safety_report, f, indent=2)
-print('✓ Generated: monthly_safety_report.json')
 
 # ============================================================================
 # 2. HOTSPOT ANALYSIS REPORT
 # ============================================================================
-# Filter out invalid locations
-df_valid = df[(df['latitude'] != 0) & (df['longitude'] != 0) & df['latitude'].notna() & df['longitude'].notna()].copy()
-df_valid['location'] = df_valid['latitude'].round(3).astype(str) + ',' + df_valid['longitude'].round(3).astype(str)
-
-# Group by location
-hotspot_agg = df_valid.groupby('location').agg({
-    'collision_severity': 'count',
-    'number_of_casualties': 'sum'
-}).rename(columns={'collision_severity': 'incident_count'})
-
-# Get severity breakdown
-severity_by_location = df_valid.groupby(['location', 'collision_severity']).size().unstack(fill_value=0)
-
-hotspots_list = []
-for loc in severity_by_location.index:
-    data = hotspot_agg.loc[loc]
-    sb = severity_by_location.loc[loc].to_dict()
-    lat, lng = map(float, loc.split(','))
-    incident_count = int(data['incident_count'])
-    
-    hotspots_list.append({
-        'location': loc,
-        'lat': lat,
-        'lng': lng,
-        'incidents': incident_count,
-        'casualties': int(data['number_of_casualties']),
-        'risk_level': 'CRITICAL' if incident_count > 50 else 'HIGH' if incident_count > 20 else 'MEDIUM',
-        'severity_breakdown': {
-            'fatal': int(sb.get(1.0, 0)),
-            'severe': int(sb.get(2.0, 0)),
-            'slight': int(sb.get(3.0, 0))
-        }
-    })
-
-hotspots_list = sorted(hotspots_list, key=lambda x: x['incidents'], reverse=True)[:50]
-
-hotspot_report = {
-    'report_title': 'Hotspot Analysis Report: High-Risk Zones and Recommendations',
-    'generated_date': datetime.now().isoformat(),
-    'total_unique_hotspots': len(severity_by_location),
-    'top_hotspots': hotspots_list,
-    'recommendations': [
-        'Deploy additional police units at CRITICAL risk zones during peak hours',
-        'Install traffic calming measures in HIGH risk areas',
-        'Implement speed monitoring and enforcement at hotspots',
-        'Improve street lighting and visibility at frequent accident locations',
-        'Analyze underlying causes (intersections, road design, etc.) for targeted interventions'
-    ]
-}
+def build_hotspot_analysis(outputs, frame):
+    df = pd.read_pickle(frame)
+    # Filter out invalid locations
+    df_valid = df[(df['latitude'] != 0) & (df['longitude'] != 0) & df['latitude'].notna() & df['longitude'].notna()].copy()
+    df_valid['location'] = df_valid['latitude'].round(3).astype(str) + ',' + df_valid['longitude'].round(3).astype(str)
+
+    # Group by location
+    hotspot_agg = df_valid.groupby('location').agg({
+        'collision_severity': 'count',
+        'number_of_casualties': 'sum'
+    }).rename(columns={'collision_severity': 'incident_count'})
+
+    # Get severity breakdown
+    severity_by_location = df_valid.groupby(['location', 'collision_severity']).size().unstack(fill_value=0)
+
+    # Rank first and build only the top 50 (ties keep location order)
+    top = hotspot_agg['incident_count'].reindex(severity_by_location.index).nlargest(50, keep='first').index
+    hotspots_list = []
+    for loc, data, sb in zip(top, hotspot_agg.loc[top].itertuples(index=False),
+                             severity_by_location.loc[top].to_dict('records')):
+        lat, lng = map(float, loc.split(','))
+        incident_count = int(data.incident_count)
+
+        hotspots_list.append({
+            'location': loc,
+            'lat': lat,
+            'lng': lng,
+            'incidents': incident_count,
+            'casualties': int(data.number_of_casualties),
+            'risk_level': 'CRITICAL' if incident_count > 50 else 'HIGH' if incident_count > 20 else 'MEDIUM',
+            'severity_breakdown': _severity_breakdown(sb)
+        })
+
+    hotspot_report = {
+        'report_title': 'Hotspot Analysis Report: High-Risk Zones and Recommendations',
+        'generated_date': datetime.now().isoformat(),
+        'total_unique_hotspots': len(severity_by_location),
+        'top_hotspots': hotspots_list,
+        'recommendations': [
+            'Deploy additional police units at CRITICAL risk zones during peak hours',
+            'Install traffic calming measures in HIGH risk areas',
+            'Implement speed monitoring and enforcement at hotspots',
+            'Improve street lighting and visibility at frequent accident locations',
+            'Analyze underlying causes (intersections, road design, etc.) for targeted interventions'
+        ]
+    }
+    _write_json(outputs[0], hotspot_report)
 
-with open(os.path.join(OUT_DIR, 'hotspot_analysis_report.json'), 'w') as f:
-    json.dump(hotspot_report, f, indent=2)
-print('✓ Generated: hotspot_analysis_report.json')
 
 # ============================================================================
 # 3. EMERGENCY RESPONSE METRICS
 # ============================================================================
-# Analyze police response using vectorized operations
-police_agg = df.groupby('police_force').agg({
-    'did_police_officer_attend_scene_of_accident': ['sum', 'count']
-}).reset_index()
-police_agg.columns = ['force_id', 'attended', 'incidents']
-police_agg['not_attended'] = police_agg['incidents'] - police_agg['attended']
-police_agg['response_rate'] = (100 * police_agg['attended'] / police_agg['incidents']).round(2)
-police_agg = police_agg.sort_values('incidents', ascending=False).head(15)
-
-response_metrics = {
-    'by_police_force': [
-        {
-            'force_id': str(int(row['force_id'])),
-            'total_incidents': int(row['incidents']),
-            'attended': int(row['attended']),
-            'not_attended': int(row['not_attended']),
-            'response_rate': float(row['response_rate'])
-        }
-        for _, row in police_agg.iterrows()
-    ]
-}
-
+def build_emergency_response(outputs, frame):
+    df = pd.read_pickle(frame)
+    # Analyze police response using vectorized operations
+    police_agg = df.groupby('police_force').agg({
+        'did_police_officer_attend_scene_of_accident': ['sum', 'count']
+    }).reset_index()
+    police_agg.columns = ['force_id', 'attended', 'incidents']
+    police_agg['not_attended'] = police_agg['incidents'] - police_agg['attended']
+    police_agg['response_rate'] = (100 * police_agg['attended'] / police_agg['incidents']).round(2)
+    police_agg = police_agg.sort_values('incidents', ascending=False).head(15)
+
+    response_metrics = {
+        'by_police_force': [
+            {
+                'force_id': str(int(row['force_id'])),
+                'total_incidents': int(row['incidents']),
+                'attended': int(row['attended']),
+                'not_attended': int(row['not_attended']),
+                'response_rate': float(row['response_rate'])
+            }
+            for _, row in police_agg.iterrows()
+        ]
+    }
 
-# Hourly incident distribution for resource planning
-df['hour'] = df['date'].dt.hour
-hourly_dist = df.groupby('hour').size().to_dict()
-peak_hours = sorted(hourly_dist.items(), key=lambda x: x[1], reverse=True)[:5]
-
-emergency_response_metrics = {
-    'report_title': 'Emergency Response Metrics: Response Time and Resource Allocation',
-    'generated_date': datetime.now().isoformat(),
-    'police_response': {
-        'by_police_force': response_metrics['by_police_force'],
-        'overall_response_rate': round(100 * df['did_police_officer_attend_scene_of_accident'].sum() / len(df), 2),
-    },
-    'hourly_distribution': {
-        'peak_incident_hours': [{'hour': h, 'incidents': c} for h, c in peak_hours],
-        'all_hours': [{'hour': h, 'incidents': hourly_dist.get(h, 0)} for h in range(24)]
-    },
-    'resource_allocation_recommendations': {
-        'peak_hours': '16:00-18:00 (4-6 PM) require maximum coverage',
-        'night_shift': '00:00-06:00 can operate with reduced resources',
-        'weekend': 'Friday-Saturday show 20% higher incident rates',
-        'high_force_load': 'Forces 1, 20, 99 handle 30%+ of all incidents - consider support allocation'
+    # Hourly incident distribution for resource planning
+    df['hour'] = df['date'].dt.hour
+    hourly_dist = df.groupby('hour').size().to_dict()
+    peak_hours = sorted(hourly_dist.items(), key=lambda x: x[1], reverse=True)[:5]
+
+    emergency_response_metrics = {
+        'report_title': 'Emergency Response Metrics: Response Time and Resource Allocation',
+        'generated_date': datetime.now().isoformat(),
+        'police_response': {
+            'by_police_force': response_metrics['by_police_force'],
+            'overall_response_rate': round(100 * df['did_police_officer_attend_scene_of_accident'].sum() / len(df), 2),
+        },
+        'hourly_distribution': {
+            'peak_incident_hours': [{'hour': int(h), 'incidents': int(c)} for h, c in peak_hours],
+            'all_hours': [{'hour': h, 'incidents': int(hourly_dist.get(h, 0))} for h in range(24)]
+        },
+        'resource_allocation_recommendations': {
+            'peak_hours': '16:00-18:00 (4-6 PM) require maximum coverage',
+            'night_shift': '00:00-06:00 can operate with reduced resources',
+            'weekend': 'Friday-Saturday show 20% higher incident rates',
+            'high_force_load': 'Forces 1, 20, 99 handle 30%+ of all incidents - consider support allocation'
+        }
     }
-}
+    _write_json(outputs[0], emergency_response_metrics)
 
-with open(os.path.join(OUT_DIR, 'emergency_response_metrics.json'), 'w') as f:
-    json.dump(emergency_response_metrics, f, indent=2)
-print('✓ Generated: emergency_response_metrics.json')
 
 # ============================================================================
 # 4. MONTHLY TRENDS (separate file for easy API consumption)
 # ============================================================================
-monthly_trends_report = {
-    'report_title': 'Monthly Trend Analysis',
-    'generated_date': datetime.now().isoformat(),
-    'trends': monthly_trends
-}
+def build_monthly_trends(outputs, monthly):
+    monthly_trends_report = {
+        'report_title': 'Monthly Trend Analysis',
+        'generated_date': datetime.now().isoformat(),
+        'trends': _read_json(monthly)
+    }
+    _write_json(outputs[0], monthly_trends_report)
 
-with open(os.path.join(OUT_DIR, 'monthly_trends.json'), 'w') as f:
-    json.dump(monthly_trends_report, f, indent=2)
-print('✓ Generated: monthly_trends.json')
 
 # ============================================================================
 # 5. RISK FACTORS ANALYSIS
 # ============================================================================
-risk_factors_report = {
-    'report_title': 'Top Risk Factors Analysis',
-    'generated_date': datetime.now().isoformat(),
-    'factors': {
-        'light_conditions': [{'factor': k, 'count': int(v)} for k, v in df['light_conditions'].value_counts().head(5).items()],
-        'weather_conditions': [{'factor': k, 'count': int(v)} for k, v in df['weather_conditions'].value_counts().head(5).items()],
-        'road_surface_conditions': [{'factor': k, 'count': int(v)} for k, v in df['road_surface_conditions'].value_counts().head(5).items()],
-        'special_conditions': [{'factor': k, 'count': int(v)} for k, v in df['special_conditions_at_site'].value_counts().head(5).items()],
+def build_risk_factors(outputs, frame):
+    df = pd.read_pickle(frame)
+
+    def top(column):
+        return [{'factor': int(k) if isinstance(k, (int, np.integer)) else k, 'count': int(v)}
+                for k, v in df[column].value_counts().head(5).items()]
+
+    risk_factors_report = {
+        'report_title': 'Top Risk Factors Analysis',
+        'generated_date': datetime.now().isoformat(),
+        'factors': {
+            'light_conditions': top('light_conditions'),
+            'weather_conditions': top('weather_conditions'),
+            'road_surface_conditions': top('road_surface_conditions'),
+            'special_conditions': top('special_conditions_at_site'),
+        }
     }
-}
+    _write_json(outputs[0], risk_factors_report)
 
-with open(os.path.join(OUT_DIR, 'risk_factors_analysis.json'), 'w') as f:
-    json.dump(risk_factors_report, f, indent=2)
-print('✓ Generated: risk_factors_analysis.json')
 
 # ============================================================================
 # 6. SEVERITY DISTRIBUTION
 # ============================================================================
-severity_counts = df['collision_severity'].value_counts().to_dict()
-total = len(df)
-
-severity_distribution = {
-    'report_title': 'Severity Distribution Analysis',
-    'generated_date': datetime.now().isoformat(),
-    'total_incidents': total,
-    'distribution': [
-        {
-            'severity_level': 'Fatal',
-            'code': 1,
-            'count': int(severity_counts.get(1.0, 0)),
-            'percentage': round(100 * severity_counts.get(1.0, 0) / total, 2)
-        },
-        {
-            'severity_level': 'Severe',
-            'code': 2,
-            'count': int(severity_counts.get(2.0, 0)),
-            'percentage': round(100 * severity_counts.get(2.0, 0) / total, 2)
-        },
-        {
-            'severity_level': 'Slight',
-            'code': 3,
-            'count': int(severity_counts.get(3.0, 0)),
-            'percentage': round(100 * severity_counts.get(3.0, 0) / total, 2)
+def build_severity_distribution(outputs, frame):
+    df = pd.read_pickle(frame)
+    severity_counts = df['collision_severity'].value_counts().to_dict()
+    total = len(df)
+
+    def level(name, code):
+        count = severity_counts.get(float(code), 0)
+        return {
+            'severity_level': name,
+            'code': code,
+            'count': int(count),
+            'percentage': round(100 * count / total, 2)
         }
-    ]
+
+    severity_distribution = {
+        'report_title': 'Severity Distribution Analysis',
+        'generated_date': datetime.now().isoformat(),
+        'total_incidents': total,
+        'distribution': [level('Fatal', 1), level('Severe', 2), level('Slight', 3)]
+    }
+    _write_json(outputs[0], severity_distribution)
+
+
+# ============================================================================
+# BUILD GRAPH
+# ============================================================================
+# name -> deps (passed to `run` as keyword args, by node name) and outputs.
+# 'csv' is the only source node.
+NODES = {
+    'frame': {'deps': ['csv'], 'outputs': [_build('frame.pkl')], 'run': build_frame},
+    'monthly': {'deps': ['frame'], 'outputs': [_build('monthly.json')], 'run': build_monthly},
+    'monthly_safety': {'deps': ['frame', 'monthly'], 'outputs': [_build('monthly_safety_report.json')],
+                       'run': build_monthly_safety},
+    'month_names': {'deps': ['monthly_safety'], 'outputs': [_out('monthly_safety_report.json')],
+                    'run': build_month_names},
+    'hotspot_analysis': {'deps': ['frame'], 'outputs': [_out('hotspot_analysis_report.json')],
+                         'run': build_hotspot_analysis},
+    'emergency_response': {'deps': ['frame'], 'outputs': [_out('emergency_response_metrics.json')],
+                           'run': build_emergency_response},
+    'monthly_trends': {'deps': ['monthly'], 'outputs': [_out('monthly_trends.json')], 'run': build_monthly_trends},
+    'risk_factors': {'deps': ['frame'], 'outputs': [_out('risk_factors_analysis.json')], 'run': build_risk_factors},
+    'severity_distribution': {'deps': ['frame'], 'outputs': [_out('severity_distribution.json')],
+                              'run': build_severity_distribution},
 }
 
-with open(os.path.join(OUT_DIR, 'severity_distribution.json'), 'w') as f:
-    json.dump(severity_distribution, f, indent=2)
-print('✓ Generated: severity_distribution.json')
-
-print('\n✓ All reports generated successfully in:', OUT_DIR)
-print('\nGenerated files:')
-print('  1. monthly_safety_report.json')
-print('  2. hotspot_analysis_report.json')
-print('  3. emergency_response_metrics.json')
-print('  4. monthly_trends.json')
-print('  5. risk_factors_analysis.json')
-print('  6. severity_distribution.json')
+
+def _file_hash(path, manifest):
+    """Content hash of a source file, reused while its size/mtime are unchanged."""
+    st = os.stat(path)
+    cached = manifest.get('sources', {}).get(path)
+    if cached and cached['size'] == st.st_size and cached['mtime_ns'] == st.st_mtime_ns:
+        return cached['sha1']
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    manifest.setdefault('sources', {})[path] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                                                'sha1': h.hexdigest()}
+    return h.hexdigest()
+
+
+def _node_keys(manifest):
+    """Key every node by its code, CODE_VERSION and its dependencies' keys."""
+    import convert_month_names
+    keys = {'csv': _file_hash(CSV_PATH, manifest)}
+    extra = {'month_names': inspect.getsource(convert_month_names.add_month_names)}
+
+    def key(name):
+        if name not in keys:
+            node = NODES[name]
+            h = hashlib.sha1()
+            h.update(f'{name}:{CODE_VERSION}'.encode())
+            h.update(inspect.getsource(node['run']).encode())
+            h.update(extra.get(name, '').encode())
+            for dep in node['deps']:
+                h.update(key(dep).encode())
+            keys[name] = h.hexdigest()
+        return keys[name]
+
+    for name in NODES:
+        key(name)
+    return keys
+
+
+def _run_node(name):
+    node = NODES[name]
+    start = time.time()
+    kwargs = {dep: NODES[dep]['outputs'][0] for dep in node['deps'] if dep in NODES}
+    node['run'](node['outputs'], **kwargs)
+    return time.time() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the report files from accidents.csv')
+    parser.add_argument('--force', action='store_true', help='rebuild every node')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    try:
+        manifest = _read_json(MANIFEST_PATH)
+    except Exception:
+        manifest = {}
+    built = manifest.setdefault('nodes', {})
+    keys = _node_keys(manifest)
+
+    def fresh(name):
+        return (not args.force and built.get(name) == keys[name]
+                and all(os.path.exists(p) for p in NODES[name]['outputs']))
+
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+    started = time.time()
+    done = {'csv'}
+    running = {}
+    rebuilt = []
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        while len(done) < len(NODES) + 1:
+            for name, node in NODES.items():
+                if name in done or name in running.values() or not all(d in done for d in node['deps']):
+                    continue
+                if fresh(name):
+                    print(f'- {name}: up to date')
+                    done.add(name)
+                    continue
+                running[pool.submit(_run_node, name)] = name
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                elapsed = future.result()
+                built[name] = keys[name]
+                _write_json(MANIFEST_PATH, manifest)
+                rebuilt.append(name)
+                done.add(name)
+                print(f'✓ Generated: {name} ({elapsed:.1f}s)')
+
+    print(f'\n✓ Reports up to date in {OUT_DIR} ({len(rebuilt)} of {len(NODES)} nodes rebuilt, '
+          f'{time.time() - started:.1f}s)')
+    print('\nGenerated files:')
+    print('  1. monthly_safety_report.json')
+    print('  2. hotspot_analysis_report.json')
+    print('  3. emergency_response_metrics.json')
+    print('  4. monthly_trends.json')
+    print('  5. risk_factors_analysis.json')
+    print('  6. severity_distribution.json')
+
+
+if __name__ == '__main__':
+    main()
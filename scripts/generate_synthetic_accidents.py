@@ -0,0 +1,214 @@
+"""
+generate_synthetic_accidents.py
+Generate a synthetic accidents.csv with the columns the pipeline scripts
+read, for running, benchmarking and stress-testing them locally.
+
+Distributions are calibrated from the committed outputs:
+  - month volume, casualties per incident and severity mix per month
+    (reports/monthly_trends.json)
+  - day of week and hour of day (accidents_summary.json); dates are drawn
+    so day_of_week always matches the date
+  - police force volumes and attendance rate per force
+    (reports/emergency_response_metrics.json)
+  - light, weather, road surface and special conditions codes
+    (reports/risk_factors_analysis.json)
+  - locations: hotspot cells at their observed share
+    (accidents_hotspots.geojson), the rest scattered around them
+Driver/vehicle columns used by the model (age_of_driver, vehicle_type,
+age_of_vehicle, engine_capacity_cc, sex_of_driver, speed_limit) have no
+committed calibration source and use fixed priors.
+
+Rows are sampled with vectorized NumPy in fixed-size blocks, each from its
+own child of the seed, so output is reproducible for a given --seed.
+
+Run:
+  python scripts/generate_synthetic_accidents.py --rows 10000000 --out /tmp/accidents.csv
+  python scripts/generate_synthetic_accidents.py   # 100,000 rows -> backend/data/accidents.csv
+
+Requirements: pandas, numpy
+"""
+import os, sys, json, time, argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DATA_DIR = os.path.join(ROOT, 'backend', 'data')
+REPORTS_DIR = os.path.join(DATA_DIR, 'reports')
+OUT_PATH = os.path.join(DATA_DIR, 'accidents.csv')
+
+# Rows per block; part of the sampling scheme, so changing it changes output
+BLOCK_ROWS = 1000000
+
+COLUMNS = [
+    'accident_index', 'date', 'time', 'latitude', 'longitude', 'collision_severity',
+    'number_of_casualties', 'police_force', 'day_of_week', 'light_conditions',
+    'weather_conditions', 'road_surface_conditions', 'special_conditions_at_site',
+    'did_police_officer_attend_scene_of_accident', 'speed_limit', 'age_of_driver',
+    'sex_of_driver', 'vehicle_type', 'age_of_vehicle', 'engine_capacity_cc',
+]
+
+# Fixed priors for columns without a committed calibration source
+SPEED_LIMITS = ([20, 30, 40, 50, 60, 70], [0.15, 0.55, 0.08, 0.03, 0.11, 0.08])
+SEX_OF_DRIVER = ([1, 2, 3], [0.66, 0.29, 0.05])
+VEHICLE_TYPES = ([9, 19, 11, 3, 5, 1, 21, 90], [0.70, 0.08, 0.03, 0.04, 0.05, 0.05, 0.02, 0.03])
+ENGINE_CC = {1: 0, 3: 125, 5: 650, 9: 1600, 11: 7000, 19: 2200, 21: 9000, 90: 1600}
+OTHER_FORCES = [3, 4, 5, 6, 7, 10, 11, 12, 14, 16, 17, 21, 22, 23, 30, 31, 32, 33, 34, 35, 36,
+                37, 40, 41, 45, 48, 52, 53, 54, 55, 60, 61, 62, 63]
+
+try:
+    import pandas as pd
+    import numpy as np
+except Exception:
+    print('ERROR: pandas and numpy required. Install with: pip install pandas numpy')
+    sys.exit(1)
+
+
+def _load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _probs(weights):
+    w = np.asarray(weights, dtype=np.float64)
+    return w / w.sum()
+
+
+def calibrate():
+    """Build the sampling tables from the committed summary and reports."""
+    summary = _load(os.path.join(DATA_DIR, 'accidents_summary.json'))
+    trends = _load(os.path.join(REPORTS_DIR, 'monthly_trends.json'))['trends']
+    police = _load(os.path.join(REPORTS_DIR, 'emergency_response_metrics.json'))['police_response']
+    factors = _load(os.path.join(REPORTS_DIR, 'risk_factors_analysis.json'))['factors']
+    hotspots = _load(os.path.join(DATA_DIR, 'accidents_hotspots.geojson'))['features']
+    total = summary['total_rows']
+
+    # Dates: month volume x day-of-week share, one weight per calendar day
+    dow_share = {int(d['key']): d['count'] for d in summary['by_day_of_week'] if d['key'].isdigit()}
+    dates = pd.date_range(trends[0]['month'] + '-01', pd.Period(trends[-1]['month']).end_time.normalize(), freq='D')
+    month_of = dates.strftime('%Y-%m')
+    month_idx = {t['month']: i for i, t in enumerate(trends)}
+    days_in_month = pd.Series(month_of).value_counts()
+    dow = ((dates.dayofweek.to_numpy() + 1) % 7) + 1  # 1=Sunday .. 7=Saturday
+    date_w = np.array([trends[month_idx[m]]['incidents'] / days_in_month[m] for m in month_of])
+    date_w *= np.array([dow_share.get(d, 1) for d in dow]) / np.mean(list(dow_share.values()))
+
+    # Severity mix and casualties per incident by month
+    sev = np.array([[t['severity_breakdown'][k] for k in ('fatal', 'severe', 'slight')] for t in trends], dtype=float)
+    casualty_rate = np.array([t['casualties'] / max(t['incidents'], 1) for t in trends])
+
+    # Police forces: reported forces at their volumes and attendance rates,
+    # any remainder of the summary total spread evenly over the other forces
+    forces = [int(p['force_id']) for p in police['by_police_force']]
+    force_w = [p['total_incidents'] for p in police['by_police_force']]
+    attend = [p['response_rate'] / 100 for p in police['by_police_force']]
+    rest = max(total - sum(force_w), 0)
+    others = [f for f in OTHER_FORCES if f not in forces]
+    forces += others
+    force_w += [rest / len(others)] * len(others)
+    attend += [police['overall_response_rate'] / 100] * len(others)
+
+    def factor_table(key):
+        return [int(f['factor']) for f in factors[key]], _probs([f['count'] for f in factors[key]])
+
+    hot = np.array([[f['geometry']['coordinates'][1], f['geometry']['coordinates'][0], f['properties']['count']]
+                    for f in hotspots], dtype=float)
+    return {
+        'dates': dates, 'dow': dow, 'date_p': _probs(date_w),
+        'month_of_date': np.array([month_idx[m] for m in month_of]),
+        'sev_cdf': np.cumsum(sev / sev.sum(axis=1, keepdims=True), axis=1),
+        'casualty_rate': casualty_rate,
+        'hour_p': _probs([next((h['count'] for h in summary['by_hour'] if h['key'] == f'{i:02d}'), 0)
+                          for i in range(24)]),
+        'forces': np.array(forces), 'force_p': _probs(force_w), 'attend': np.array(attend),
+        'light': factor_table('light_conditions'), 'weather': factor_table('weather_conditions'),
+        'road': factor_table('road_surface_conditions'), 'special': factor_table('special_conditions'),
+        'hot_latlng': hot[:, :2], 'hot_p': _probs(hot[:, 2]), 'hot_share': hot[:, 2].sum() / total,
+    }
+
+
+def sample_block(cal, rng, start, n):
+    """Sample `n` rows as a DataFrame with COLUMNS; `start` numbers accident_index."""
+    d = rng.choice(len(cal['dates']), size=n, p=cal['date_p'])
+    month = cal['month_of_date'][d]
+    hour = rng.choice(24, size=n, p=cal['hour_p'])
+    minute = rng.integers(0, 60, size=n)
+
+    # Severity by month through per-row inverse CDF
+    u = rng.random(n)
+    severity = (u[:, None] > cal['sev_cdf'][month]).sum(axis=1) + 1
+    casualties = 1 + rng.poisson(np.maximum(cal['casualty_rate'][month] - 1, 0))
+
+    f = rng.choice(len(cal['forces']), size=n, p=cal['force_p'])
+    attended = (rng.random(n) < cal['attend'][f]).astype(np.int8)
+
+    # Locations: hotspot cells at their observed share, the rest scattered around them
+    centers = cal['hot_latlng'][rng.choice(len(cal['hot_p']), size=n, p=cal['hot_p'])]
+    in_hot = rng.random(n) < cal['hot_share']
+    spread = np.where(in_hot, 0.0003, 0.25)[:, None]
+    latlng = centers + rng.normal(0.0, 1.0, size=(n, 2)) * spread
+
+    speeds, speed_p = SPEED_LIMITS
+    vtypes, vtype_p = VEHICLE_TYPES
+    vehicle = rng.choice(vtypes, size=n, p=vtype_p)
+    base_cc = pd.Series(vehicle).map(ENGINE_CC).to_numpy(dtype=float)
+    engine = np.where(base_cc > 0, np.round(base_cc * rng.lognormal(0, 0.25, n), -1), -1).astype(np.int64)
+    age_driver = np.clip(np.round(rng.normal(39, 15, n)), 17, 95).astype(np.int64)
+    age_driver[rng.random(n) < 0.08] = -1
+    age_vehicle = np.round(rng.gamma(2.2, 3.5, n)).astype(np.int64)
+    age_vehicle[rng.random(n) < 0.15] = -1
+
+    def codes(table):
+        values, p = table
+        return rng.choice(values, size=n, p=p)
+
+    date_str = cal['dates'].strftime('%d/%m/%Y').to_numpy()
+    time_table = np.array([f'{h:02d}:{m:02d}' for h in range(24) for m in range(60)], dtype=object)
+    year = cal['dates'][0].year
+    return pd.DataFrame({
+        'accident_index': np.char.add(f'{year}', np.char.zfill(np.arange(start, start + n).astype(str), 9)),
+        'date': date_str[d],
+        'time': time_table[hour * 60 + minute],
+        'latitude': np.round(latlng[:, 0], 6),
+        'longitude': np.round(latlng[:, 1], 6),
+        'collision_severity': severity,
+        'number_of_casualties': casualties,
+        'police_force': cal['forces'][f],
+        'day_of_week': cal['dow'][d],
+        'light_conditions': codes(cal['light']),
+        'weather_conditions': codes(cal['weather']),
+        'road_surface_conditions': codes(cal['road']),
+        'special_conditions_at_site': codes(cal['special']),
+        'did_police_officer_attend_scene_of_accident': attended,
+        'speed_limit': rng.choice(speeds, size=n, p=speed_p),
+        'age_of_driver': age_driver,
+        'sex_of_driver': rng.choice(SEX_OF_DRIVER[0], size=n, p=SEX_OF_DRIVER[1]),
+        'vehicle_type': vehicle,
+        'age_of_vehicle': age_vehicle,
+        'engine_capacity_cc': engine,
+    }, columns=COLUMNS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic accidents.csv')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default=OUT_PATH)
+    args = parser.parse_args(argv)
+    if args.rows < 1:
+        parser.error('--rows must be at least 1')
+
+    cal = calibrate()
+    seeds = np.random.SeedSequence(args.seed).spawn((args.rows + BLOCK_ROWS - 1) // BLOCK_ROWS)
+    start = time.time()
+    tmp = args.out + '.tmp'
+    written = 0
+    for i, seed in enumerate(seeds):
+        n = min(BLOCK_ROWS, args.rows - written)
+        block = sample_block(cal, np.random.default_rng(seed), written, n)
+        block.to_csv(tmp, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        written += n
+        print(f'  {written:,} rows ({time.time() - start:.1f}s)')
+    os.replace(tmp, args.out)
+    print(f'Wrote {written:,} synthetic rows to {args.out} in {time.time() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Bounded-memory top-k for location cells (mergeable Misra-Gries summary).
+
+Cells are int64 keys from `cell_keys` (lat/lng rounded to 3 decimals, as in
+process_accidents.py). A `HeavyHitters` summary keeps at most `capacity`
+counters. Estimates never exceed the true count and undershoot it by at most
+`error`, which is itself at most total / (capacity + 1), so every cell with
+more than that many incidents is guaranteed to be tracked. Summaries built
+on different chunks or workers can be merged with the same guarantee.
+
+Requirements: numpy
+"""
+import numpy as np
+
+LAT_OFFSET = 90000
+LNG_OFFSET = 180000
+LNG_SPAN = 360001
+
+
+def cell_keys(lat, lng):
+    """Encode lat/lng arrays (degrees) as int64 keys of 0.001 degree cells."""
+    lat_i = np.round(np.asarray(lat, dtype=np.float64) * 1000).astype(np.int64) + LAT_OFFSET
+    lng_i = np.round(np.asarray(lng, dtype=np.float64) * 1000).astype(np.int64) + LNG_OFFSET
+    return lat_i * LNG_SPAN + lng_i
+
+
+def cell_latlng(keys):
+    """Inverse of `cell_keys`: returns (lat, lng) float arrays."""
+    lat_i, lng_i = np.divmod(np.asarray(keys, dtype=np.int64), LNG_SPAN)
+    return (lat_i - LAT_OFFSET) / 1000.0, (lng_i - LNG_OFFSET) / 1000.0
+
+
+class HeavyHitters:
+    """Mergeable Misra-Gries summary over int64 keys with at most `capacity` counters."""
+
+    def __init__(self, capacity=5000):
+        self.capacity = int(capacity)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.total = 0   # weight of everything summarized
+        self.error = 0   # max undercount of any estimate
+
+    def update(self, keys, counts=None):
+        """Add a batch of keys (optionally pre-aggregated with `counts`)."""
+        keys = np.asarray(keys, dtype=np.int64)
+        counts = np.ones(len(keys), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.total += int(counts.sum())
+        self._combine(keys, counts)
+        return self
+
+    def merge(self, other):
+        """Fold another summary (e.g. from another chunk or worker) into this one."""
+        self.total += other.total
+        self.error += other.error
+        self._combine(other.keys, other.counts)
+        return self
+
+    def _combine(self, keys, counts):
+        uniq, inv = np.unique(np.concatenate([self.keys, keys]), return_inverse=True)
+        summed = np.bincount(inv, weights=np.concatenate([self.counts, counts])).astype(np.int64)
+        if len(uniq) > self.capacity:
+            # Subtract the (capacity+1)-th largest count and drop what falls to zero
+            cut = int(np.partition(summed, len(summed) - self.capacity - 1)[len(summed) - self.capacity - 1])
+            summed -= cut
+            keep = summed > 0
+            uniq, summed = uniq[keep], summed[keep]
+            self.error += cut
+        self.keys, self.counts = uniq, summed
+
+    def top(self, n):
+        """Return the `n` largest cells as (keys, lower_bound, upper_bound) arrays."""
+        order = np.lexsort((self.keys, -self.counts))[:n]
+        lower = self.counts[order]
+        return self.keys[order], lower, lower + self.error
+
+    @property
+    def error_bound(self):
+        """Guaranteed worst case of `error`: total / (capacity + 1)."""
+        return self.total / (self.capacity + 1)
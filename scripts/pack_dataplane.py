@@ -0,0 +1,37 @@
+"""
+pack_dataplane.py
+Pack the datasets the backend serves (summary, hotspot GeoJSON, reports,
+heatmap slices, tile and route-risk points, map data) into one
+memory-mappable file, backend/data/dataplane.bin (see backend/dataplane.py).
+
+Every backend worker maps the file read-only and serves views into it, so
+adding workers costs almost no memory. The file is replaced atomically;
+running workers switch to it on their next request. Run this last, after
+process_accidents.py, generate_reports.py and emerging_hotspots.py. Datasets
+changed after packing are served from their files until the next pack.
+
+Run: python scripts/pack_dataplane.py
+
+Requirements: numpy, scipy
+"""
+import os, sys, time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+DATA_DIR = os.path.join(ROOT, 'backend', 'data')
+
+from dataplane import DataPlane, pack
+
+
+def main():
+    start = time.time()
+    version, path = pack(DATA_DIR)
+    plane = DataPlane(path)
+    datasets = plane.meta.get('datasets', {})
+    print('Packed {} datasets ({}) into {} ({:.1f} MB, version {}) in {:.1f}s'.format(
+        len(datasets), ', '.join(sorted(datasets)), path, os.path.getsize(path) / 2 ** 20,
+        version, time.time() - start))
+
+
+if __name__ == '__main__':
+    main()
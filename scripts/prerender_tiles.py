@@ -0,0 +1,54 @@
+"""
+prerender_tiles.py
+Render heatmap tiles for low zoom levels into the backend's disk tile cache
+(backend/data/tiles/), so /api/tiles/heatmap serves them without rendering
+on first view. Only tiles covering the accident data's bounding box are
+rendered; tiles for an older version of the data are left to LRU eviction.
+
+Run:
+  python scripts/prerender_tiles.py               # zoom 0-8
+  python scripts/prerender_tiles.py --max-zoom 10
+
+Requirements: numpy, scipy
+"""
+import os, sys, time, argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+DATA_DIR = os.path.join(ROOT, 'backend', 'data')
+TILES_DIR = os.path.join(DATA_DIR, 'tiles')
+
+from heatmap_tiles import HeatmapTileRenderer, TileCache, load_points, source_version, tile_key, tiles_covering
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pre-render heatmap tiles into the disk cache')
+    parser.add_argument('--min-zoom', type=int, default=0)
+    parser.add_argument('--max-zoom', type=int, default=8)
+    parser.add_argument('--disk-mb', type=int, default=int(os.environ.get('DRIVESMART_TILE_DISK_MB', '256')))
+    args = parser.parse_args(argv)
+
+    points = load_points(DATA_DIR)
+    if points is None:
+        print('No heatmap data found; run scripts/process_accidents.py first')
+        sys.exit(1)
+    lat, lng, weight, source = points
+    version = source_version(source)
+    renderer = HeatmapTileRenderer(lat, lng, weight)
+    cache = TileCache(TILES_DIR, max_memory_tiles=0, max_disk_bytes=args.disk_mb << 20)
+    print(f'Rendering {len(lat):,} cells from {source} (version {version})')
+
+    start = time.time()
+    for z in range(args.min_zoom, args.max_zoom + 1):
+        rendered = 0
+        for x, y in tiles_covering(lat, lng, z):
+            body = renderer.render(z, x, y)
+            if body is not renderer.empty_tile():
+                cache.put(tile_key(version, z, x, y), body)
+                rendered += 1
+        print(f'  zoom {z}: {rendered} tiles')
+    print(f'Done in {time.time() - start:.1f}s -> {TILES_DIR}')
+
+
+if __name__ == '__main__':
+    main()
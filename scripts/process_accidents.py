@@ -3,22 +3,48 @@ Process accidents.csv and produce summary JSON and GeoJSON hotspots.
 Outputs:
  - backend/data/accidents_summary.json
  - backend/data/accidents_hotspots.geojson
+ - backend/data/accidents_hotspots.ndjson  (same features, one per line, for streaming)
+ - backend/data/heatmap_slices.npz  (location x day_of_week x hour counts)
+ - backend/data/daily_index.npz  (prefix sums of daily incidents, casualties and severity)
+ - backend/data/monthly_cells.npz  (sparse month x location cell counts)
 
-Requirements: pandas
+Options:
+ --sketch           rank hotspots with a fixed-memory mergeable summary
+                    (see hotspot_sketch.py) instead of an exact Counter
+ --capacity N       counters kept by the summary (default 5000)
+ --check-sketch     run both and report how the sketch top-200 compares
+                    with the exact counts
+
+Requirements: pandas, numpy
 """
-import os, json
+import os, json, argparse
 from collections import Counter
 
+from hotspot_sketch import HeavyHitters, cell_keys, cell_latlng
+
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 CSV_PATH = os.path.join(ROOT, 'backend', 'data', 'accidents.csv')
 OUT_SUMMARY = os.path.join(ROOT, 'backend', 'data', 'accidents_summary.json')
 OUT_HOTSPOTS = os.path.join(ROOT, 'backend', 'data', 'accidents_hotspots.geojson')
+OUT_HOTSPOTS_NDJSON = os.path.join(ROOT, 'backend', 'data', 'accidents_hotspots.ndjson')
+OUT_SLICES = os.path.join(ROOT, 'backend', 'data', 'heatmap_slices.npz')
+OUT_DAILY = os.path.join(ROOT, 'backend', 'data', 'daily_index.npz')
+OUT_MONTH_CELLS = os.path.join(ROOT, 'backend', 'data', 'monthly_cells.npz')
+
+parser = argparse.ArgumentParser(description='Summarize accidents.csv into analytics outputs')
+parser.add_argument('--sketch', action='store_true')
+parser.add_argument('--capacity', type=int, default=5000)
+parser.add_argument('--check-sketch', action='store_true')
+args = parser.parse_args()
+use_counter = not args.sketch or args.check_sketch
+use_sketch = args.sketch or args.check_sketch
 
 print('Reading', CSV_PATH)
 try:
     import pandas as pd
+    import numpy as np
 except Exception as e:
-    print('Pandas is required. Install with: pip install pandas')
+    print('Pandas and numpy are required. Install with: pip install pandas numpy')
     raise
 
 # Read CSV in chunks to avoid memory issues if necessary
@@ -31,6 +57,23 @@ day_of_week_counter = Counter()
 hour_counter = Counter()
 force_counter = Counter()
 latlng_counter = Counter()
+latlng_sketch = HeavyHitters(args.capacity)
+# (cell, slice) -> count, where slice = (day_of_week - 1) * 24 + hour
+SLICES = 7 * 24
+slice_counts = None
+# per-day incidents, casualties and severity counts
+daily_totals = None
+# (cell, month) -> count, keyed cell * MONTH_SPAN + year * 12 + month - 1
+MONTH_SPAN = 1 << 17
+month_cell_counts = None
+
+
+def fold(total, part):
+    """Add a chunk's counts into the running totals, so memory tracks distinct keys, not rows."""
+    if total is None:
+        return part
+    return total.add(part, fill_value=0)
+
 
 for chunk in chunks:
     # Normalize column names
@@ -57,13 +100,48 @@ for chunk in chunks:
     if 'police_force' in chunk.columns:
         force_counter.update(chunk['police_force'].fillna('-1').tolist())
 
+    # daily totals for the time index
+    if 'date' in chunk.columns:
+        dates = pd.to_datetime(chunk['date'], dayfirst=True, errors='coerce')
+        sev = pd.to_numeric(chunk.get('collision_severity'), errors='coerce')
+        casualties = chunk['number_of_casualties'] if 'number_of_casualties' in chunk.columns else 0
+        daily = pd.DataFrame({
+            'day': dates.dt.normalize(),
+            'incidents': 1,
+            'casualties': pd.to_numeric(casualties, errors='coerce'),
+            'fatal': sev.eq(1).astype('int64'),
+            'severe': sev.eq(2).astype('int64'),
+            'slight': sev.eq(3).astype('int64'),
+        }).dropna(subset=['day'])
+        daily_totals = fold(daily_totals, daily.groupby('day').sum())
+
     # hotspots: use latitude & longitude
     if 'latitude' in chunk.columns and 'longitude' in chunk.columns:
         lat = pd.to_numeric(chunk['latitude'], errors='coerce')
         lng = pd.to_numeric(chunk['longitude'], errors='coerce')
         # round to 3 decimals (~100m) to aggregate nearby points
-        rounded = list(zip(lat.round(3).astype(str), lng.round(3).astype(str)))
-        latlng_counter.update(rounded)
+        if use_counter:
+            rounded = list(zip(lat.round(3).astype(str), lng.round(3).astype(str)))
+            latlng_counter.update(rounded)
+        if use_sketch:
+            valid = lat.notna() & lng.notna()
+            latlng_sketch.update(cell_keys(lat[valid], lng[valid]))
+
+        # time-sliced counts: cells keyed by integer millidegrees
+        if 'day_of_week' in chunk.columns and 'time' in chunk.columns:
+            dow = pd.to_numeric(chunk['day_of_week'], errors='coerce')
+            hour = pd.to_numeric(hours, errors='coerce')  # '-1' for a missing time
+            ok = lat.notna() & lng.notna() & dow.between(1, 7) & hour.between(0, 23)
+            slot = (dow[ok].astype('int64') - 1) * 24 + hour[ok].astype('int64')
+            key = cell_keys(lat[ok], lng[ok]) * SLICES + slot.to_numpy()
+            slice_counts = fold(slice_counts, pd.Series(key).value_counts())
+
+        # per-month cell counts for emerging-hotspot detection
+        if 'date' in chunk.columns:
+            ok = lat.notna() & lng.notna() & dates.notna()
+            month = dates[ok].dt.year.to_numpy(dtype=np.int64) * 12 + dates[ok].dt.month.to_numpy(dtype=np.int64) - 1
+            key = cell_keys(lat[ok], lng[ok]) * MONTH_SPAN + month
+            month_cell_counts = fold(month_cell_counts, pd.Series(key).value_counts())
 
 # Prepare top lists
 def top_n(counter, n=10):
@@ -83,16 +161,115 @@ print('Wrote summary to', OUT_SUMMARY)
 
 # Create GeoJSON for hotspots (top 200)
 hotspots = []
-for (lats, lngs), cnt in latlng_counter.most_common(200):
-    try:
-        latf = float(lats)
-        lngf = float(lngs)
-    except Exception:
-        continue
-    hotspots.append({'type': 'Feature', 'properties': {'count': int(cnt)}, 'geometry': {'type': 'Point', 'coordinates': [lngf, latf]}})
+if args.sketch:
+    # count is a lower bound; the true count is at most count_max
+    keys, lower, upper = latlng_sketch.top(200)
+    lats, lngs = cell_latlng(keys)
+    for latf, lngf, cnt, cmax in zip(lats.tolist(), lngs.tolist(), lower.tolist(), upper.tolist()):
+        hotspots.append({'type': 'Feature', 'properties': {'count': int(cnt), 'count_max': int(cmax)},
+                         'geometry': {'type': 'Point', 'coordinates': [lngf, latf]}})
+    print('Sketch: {} counters, error {} (bound {:.1f})'.format(len(latlng_sketch.keys), latlng_sketch.error,
+                                                                latlng_sketch.error_bound))
+else:
+    for (lats, lngs), cnt in latlng_counter.most_common(200):
+        try:
+            latf = float(lats)
+            lngf = float(lngs)
+        except Exception:
+            continue
+        hotspots.append({'type': 'Feature', 'properties': {'count': int(cnt)}, 'geometry': {'type': 'Point', 'coordinates': [lngf, latf]}})
 
 geo = {'type': 'FeatureCollection', 'features': hotspots}
 with open(OUT_HOTSPOTS, 'w', encoding='utf-8') as f:
     json.dump(geo, f)
 print('Wrote hotspots geojson to', OUT_HOTSPOTS)
+with open(OUT_HOTSPOTS_NDJSON, 'w', encoding='utf-8') as f:
+    for feature in hotspots:
+        f.write(json.dumps(feature, separators=(',', ':')) + '\n')
+print('Wrote hotspots ndjson to', OUT_HOTSPOTS_NDJSON)
+
+if args.check_sketch:
+    exact = Counter()
+    for (lats, lngs), cnt in latlng_counter.items():
+        if lats != 'nan' and lngs != 'nan':
+            exact[int(cell_keys(float(lats), float(lngs)))] += cnt
+    exact_top = exact.most_common(200)
+    keys, lower, upper = latlng_sketch.top(200)
+    in_top = set(keys.tolist())
+    tracked = dict(zip(latlng_sketch.keys.tolist(), latlng_sketch.counts.tolist()))
+    undercount = [c - tracked.get(k, 0) for k, c in exact_top]
+    within = all(0 <= exact[k] - c <= latlng_sketch.error for k, c in tracked.items())
+    print('Sketch check: {}/{} exact top-200 cells in the sketch top-200, max undercount {} '
+          '(error {}, bound {:.1f}), all {} tracked estimates within bounds: {}'.format(
+              sum(k in in_top for k, _ in exact_top), len(exact_top), max(undercount, default=0),
+              latlng_sketch.error, latlng_sketch.error_bound, len(tracked), within))
+
+# Time-sliced heatmap: one CSR row per (day_of_week, hour) slice, columns are
+# location cells, values are counts. Only non-empty cells are stored.
+if slice_counts is not None and len(slice_counts):
+    counts = slice_counts
+    keys = counts.index.to_numpy(dtype=np.int64)
+    cell, slot = np.divmod(keys, SLICES)
+    cells, cell_idx = np.unique(cell, return_inverse=True)
+    order = np.lexsort((cell_idx, slot))
+    indptr = np.zeros(SLICES + 1, dtype=np.int64)
+    np.cumsum(np.bincount(slot, minlength=SLICES), out=indptr[1:])
+    cell_lat, cell_lng = cell_latlng(cells)
+    np.savez_compressed(
+        OUT_SLICES,
+        lat=cell_lat.astype(np.float32),
+        lng=cell_lng.astype(np.float32),
+        indptr=indptr,
+        indices=cell_idx[order].astype(np.int32),
+        counts=counts.to_numpy()[order].astype(np.int32),
+    )
+    print('Wrote time-sliced heatmap ({} cells, {} non-empty entries) to {}'.format(len(cells), len(keys), OUT_SLICES))
+
+# Month x cell matrix: one CSR row per calendar month from the first to the
+# last month (empty months included), columns are location cells.
+if month_cell_counts is not None and len(month_cell_counts):
+    counts = month_cell_counts
+    cell, month = np.divmod(counts.index.to_numpy(dtype=np.int64), MONTH_SPAN)
+    cells, cell_idx = np.unique(cell, return_inverse=True)
+    row = month - month.min()
+    n_months = int(row.max()) + 1
+    order = np.lexsort((cell_idx, row))
+    indptr = np.zeros(n_months + 1, dtype=np.int64)
+    np.cumsum(np.bincount(row, minlength=n_months), out=indptr[1:])
+    first = int(month.min())
+    cell_lat, cell_lng = cell_latlng(cells)
+    np.savez_compressed(
+        OUT_MONTH_CELLS,
+        start=np.array('{:04d}-{:02d}'.format(first // 12, first % 12 + 1), dtype='datetime64[M]'),
+        lat=cell_lat.astype(np.float32),
+        lng=cell_lng.astype(np.float32),
+        indptr=indptr,
+        indices=cell_idx[order].astype(np.int32),
+        counts=counts.to_numpy()[order].astype(np.int32),
+    )
+    print('Wrote month x cell counts ({} months, {} cells, {} non-empty entries) to {}'.format(
+        n_months, len(cells), len(counts), OUT_MONTH_CELLS))
+
+# Daily time index: one row per calendar day from the first to the last
+# date, stored as prefix sums (row i = totals of all days before day i) so
+# any date range is two lookups and any bucketing is one diff.
+if daily_totals is not None and len(daily_totals):
+    daily = daily_totals
+    days = pd.date_range(daily.index.min(), daily.index.max(), freq='D')
+    daily = daily.reindex(days, fill_value=0)
+
+    def prefix(values):
+        values = np.asarray(values, dtype=np.int64)
+        out = np.zeros((len(values) + 1,) + values.shape[1:], dtype=np.int64)
+        np.cumsum(values, axis=0, out=out[1:])
+        return out
+
+    np.savez_compressed(
+        OUT_DAILY,
+        start=np.array(days[0].strftime('%Y-%m-%d'), dtype='datetime64[D]'),
+        cum_incidents=prefix(daily['incidents']),
+        cum_casualties=prefix(daily['casualties'].round()),
+        cum_severity=prefix(daily[['fatal', 'severe', 'slight']]),
+    )
+    print('Wrote daily time index ({} days from {}) to {}'.format(len(days), days[0].date(), OUT_DAILY))
 print('Done')
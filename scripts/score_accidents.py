@@ -0,0 +1,119 @@
+"""
+score_accidents.py
+Bulk-score an accident/vehicle CSV with the prediction model, offline.
+
+Rows are mapped to the same 11 model inputs as /api/predict (see
+backend/features.py), streamed from the input in chunks and scored across a
+process pool. Each worker loads the model once; at most a few chunks are in
+flight, so memory stays constant however large the input is.
+
+Output CSV columns: [<id column>,] prediction, confidence
+
+Run:
+  python scripts/score_accidents.py backend/data/accidents.csv predictions.csv
+  python scripts/score_accidents.py in.csv out.csv --workers 8 --chunksize 200000
+
+Requirements: pandas, numpy, joblib, scikit-learn
+"""
+import os, sys, time, argparse
+from collections import deque
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+MODEL_PATH = os.path.join(ROOT, 'backend', 'data', 'litemodel.sav')
+
+try:
+    import pandas as pd
+    import numpy as np
+except Exception:
+    print('ERROR: pandas and numpy required. Install with: pip install pandas numpy')
+    sys.exit(1)
+
+from features import DATASET_COLUMNS, frame_to_model_features
+
+_worker_model = None
+
+
+def _init_worker(model_path):
+    global _worker_model
+    import joblib
+    _worker_model = joblib.load(model_path)
+    # Parallelism comes from the pool; keep each worker single-threaded.
+    if hasattr(_worker_model, 'n_jobs'):
+        _worker_model.n_jobs = 1
+
+
+def _score_chunk(chunk, log_ages):
+    features = frame_to_model_features(chunk, log_ages=log_ages)
+    if hasattr(_worker_model, 'predict_proba'):
+        probs = _worker_model.predict_proba(features)
+        pred = _worker_model.classes_[probs.argmax(axis=1)]
+        confidence = np.round(probs.max(axis=1) * 100, 2)
+    else:
+        pred = _worker_model.predict(features)
+        confidence = np.full(len(pred), np.nan)
+    return pred, confidence
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('input', help='CSV with the accident/vehicle columns')
+    parser.add_argument('output', help='CSV to write predictions to')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--id-column', default='accident_index',
+                        help='input column copied to the output when present')
+    parser.add_argument('--raw-ages', action='store_true',
+                        help='do not log-transform driver/vehicle ages')
+    args = parser.parse_args(argv)
+
+    header = pd.read_csv(args.input, nrows=0).columns
+    wanted = [c for c in DATASET_COLUMNS.values() if c in header]
+    missing = sorted(set(DATASET_COLUMNS.values()) - set(wanted))
+    if missing:
+        print('Warning: columns not found, using API defaults:', ', '.join(missing))
+    id_col = args.id_column if args.id_column in header else None
+    usecols = wanted + ([id_col] if id_col and id_col not in wanted else [])
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    start = time.time()
+    rows = 0
+    max_in_flight = max(2, 2 * args.workers)
+    pending = deque()
+    first = True
+
+    def write(chunk, future):
+        nonlocal first, rows
+        pred, confidence = future.result()
+        out = pd.DataFrame({'prediction': pred, 'confidence': confidence})
+        if id_col:
+            out.insert(0, id_col, chunk[id_col].to_numpy())
+        out.to_csv(args.output, mode='w' if first else 'a', header=first, index=False)
+        first = False
+        rows += len(out)
+        rate = rows / max(time.time() - start, 1e-9) * 60
+        print(f'  scored {rows:,} rows ({rate:,.0f} rows/min)')
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.model,)) as pool:
+        reader = pd.read_csv(args.input, usecols=usecols, dtype={id_col: str} if id_col else None,
+                             chunksize=args.chunksize)
+        for chunk in reader:
+            # Only the id is needed back in the parent; features stay in the worker.
+            keep = chunk[[id_col]] if id_col else chunk.iloc[:, :0]
+            pending.append((keep, pool.submit(_score_chunk, chunk[wanted], not args.raw_ages)))
+            if len(pending) >= max_in_flight:
+                write(*pending.popleft())
+        while pending:
+            write(*pending.popleft())
+
+    if first:
+        pd.DataFrame(columns=([id_col] if id_col else []) + ['prediction', 'confidence']).to_csv(args.output, index=False)
+    elapsed = time.time() - start
+    print(f'Wrote {rows:,} predictions to {args.output} in {elapsed:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
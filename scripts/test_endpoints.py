@@ -15,6 +15,8 @@ endpoints = [
     '/api/reports/monthly-trends',
     '/api/reports/risk-factors',
     '/api/reports/severity-distribution',
+    '/api/reports/emerging-hotspots',
+    '/api/reports/bundle',
 ]
 
 print('Testing DriveSmart Backend Endpoints')
@@ -0,0 +1,247 @@
+"""
+train_model.py
+Rebuild the prediction model from an accident/vehicle CSV, out of core and
+on every core.
+
+1. Stream the CSV in chunks, map each chunk to the 11 model inputs exactly
+   as /api/predict and score_accidents.py do (backend/features.py), and
+   append features and labels to flat files on disk, split into train and
+   holdout rows. Memory is bounded by the chunk size.
+2. Fit sub-forests in a process pool. Each worker memory-maps the training
+   file and fits its trees on its own random sample of at most
+   --sample-rows rows, so memory per worker is fixed however large the
+   dataset grows. The sub-forests are merged into one RandomForestClassifier.
+3. Score the holdout rows in chunks and write the model as
+   backend/data/models/litemodel-<timestamp>-<sha12>.sav, with a JSON report
+   of timings, peak memory, class balance and holdout metrics next to it.
+   --install also replaces backend/data/litemodel.sav atomically, which the
+   running backend picks up and hot-swaps.
+
+The label matches the shipped model's classes: 2 = fatal or serious
+(collision_severity 1-2), 3 = slight.
+
+Run:
+  python scripts/train_model.py backend/data/accidents.csv
+  python scripts/train_model.py big.csv --trees 400 --sample-rows 500000 --install
+
+Requirements: pandas, numpy, joblib, scikit-learn
+"""
+import os, sys, json, time, shutil, hashlib, tempfile, resource, argparse
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+DATA_DIR = os.path.join(ROOT, 'backend', 'data')
+MODELS_DIR = os.path.join(DATA_DIR, 'models')
+MODEL_PATH = os.path.join(DATA_DIR, 'litemodel.sav')
+LABEL_COLUMN = 'collision_severity'
+
+try:
+    import pandas as pd
+    import numpy as np
+except Exception:
+    print('ERROR: pandas and numpy required. Install with: pip install pandas numpy')
+    sys.exit(1)
+
+from features import DATASET_COLUMNS, FEATURE_NAMES, frame_to_model_features
+
+N_FEATURES = len(FEATURE_NAMES)
+
+
+def _labels(severity):
+    """collision_severity -> model class (2 fatal/serious, 3 slight, 0 unusable)."""
+    s = pd.to_numeric(severity, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.select([(s == 1) | (s == 2), s == 3], [2, 3], 0).astype(np.int8)
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is KiB on Linux
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+
+def stage_features(csv_path, work_dir, chunksize, holdout, seed, log_ages):
+    """Pass 1: CSV -> float32 feature / int8 label files for train and holdout."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    if LABEL_COLUMN not in header:
+        raise SystemExit('input has no {} column'.format(LABEL_COLUMN))
+    wanted = [c for c in DATASET_COLUMNS.values() if c in header]
+    missing = sorted(set(DATASET_COLUMNS.values()) - set(wanted))
+    if missing:
+        print('Warning: columns not found, using API defaults:', ', '.join(missing))
+    rng = np.random.default_rng(seed)
+    files = {part: (open(os.path.join(work_dir, part + '.X'), 'wb'), open(os.path.join(work_dir, part + '.y'), 'wb'))
+             for part in ('train', 'holdout')}
+    rows = {'train': 0, 'holdout': 0}
+    skipped = 0
+    try:
+        for chunk in pd.read_csv(csv_path, usecols=wanted + [LABEL_COLUMN], dtype=str, chunksize=chunksize):
+            y = _labels(chunk[LABEL_COLUMN])
+            ok = y > 0
+            skipped += int((~ok).sum())
+            X = frame_to_model_features(chunk[ok], log_ages=log_ages).astype(np.float32)
+            y = y[ok]
+            is_holdout = rng.random(len(y)) < holdout
+            for part, mask in (('train', ~is_holdout), ('holdout', is_holdout)):
+                fx, fy = files[part]
+                fx.write(np.ascontiguousarray(X[mask]).tobytes())
+                fy.write(y[mask].tobytes())
+                rows[part] += int(mask.sum())
+            print('  staged {:,} rows'.format(rows['train'] + rows['holdout']))
+    finally:
+        for fx, fy in files.values():
+            fx.close()
+            fy.close()
+    return rows, skipped
+
+
+def _open(work_dir, part, n):
+    X = np.memmap(os.path.join(work_dir, part + '.X'), dtype=np.float32, mode='r', shape=(n, N_FEATURES))
+    y = np.memmap(os.path.join(work_dir, part + '.y'), dtype=np.int8, mode='r', shape=(n,))
+    return X, y
+
+
+def _fit_subforest(work_dir, n_rows, n_trees, sample_rows, seed, params):
+    """Worker: fit `n_trees` trees on a random sample of the training rows."""
+    from sklearn.ensemble import RandomForestClassifier
+    X, y = _open(work_dir, 'train', n_rows)
+    rng = np.random.default_rng(seed)
+    if n_rows > sample_rows:
+        idx = np.sort(rng.choice(n_rows, size=sample_rows, replace=False))
+        Xs, ys = np.asarray(X[idx]), np.asarray(y[idx])
+    else:
+        Xs, ys = np.asarray(X), np.asarray(y)
+    forest = RandomForestClassifier(n_estimators=n_trees, n_jobs=1, random_state=seed, **params)
+    forest.fit(Xs, ys)
+    return forest, _peak_rss_mb()
+
+
+def merge_forests(forests):
+    """Combine fitted RandomForestClassifiers with identical classes into one."""
+    merged = forests[0]
+    for f in forests[1:]:
+        if not np.array_equal(f.classes_, merged.classes_):
+            raise RuntimeError('sub-forests saw different classes; increase --sample-rows')
+        merged.estimators_ += f.estimators_
+    merged.n_estimators = len(merged.estimators_)
+    return merged
+
+
+def evaluate(model, work_dir, n_rows, chunksize):
+    """Holdout accuracy, per-class recall and confusion counts, in chunks."""
+    if n_rows == 0:
+        return None
+    X, y = _open(work_dir, 'holdout', n_rows)
+    classes = model.classes_.tolist()
+    confusion = np.zeros((len(classes), len(classes)), dtype=np.int64)
+    for lo in range(0, n_rows, chunksize):
+        truth = np.searchsorted(model.classes_, np.asarray(y[lo:lo + chunksize]))
+        pred = model.predict_proba(np.asarray(X[lo:lo + chunksize])).argmax(axis=1)
+        np.add.at(confusion, (truth, pred), 1)
+    support = confusion.sum(axis=1)
+    return {
+        'rows': int(n_rows),
+        'accuracy': round(float(np.trace(confusion) / confusion.sum()), 4),
+        'recall': {str(c): round(float(confusion[i, i] / support[i]), 4) if support[i] else None
+                   for i, c in enumerate(classes)},
+        'confusion': {'classes': classes, 'matrix': confusion.tolist()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train the prediction model from an accident/vehicle CSV')
+    parser.add_argument('input', help='CSV with the accident/vehicle columns and collision_severity')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--trees', type=int, default=200)
+    parser.add_argument('--sample-rows', type=int, default=200000, help='training rows per worker')
+    parser.add_argument('--max-leaf-nodes', type=int, default=256)
+    parser.add_argument('--min-samples-leaf', type=int, default=20)
+    parser.add_argument('--class-weight', choices=['balanced', 'balanced_subsample'], default=None)
+    parser.add_argument('--holdout', type=float, default=0.1, help='fraction of rows held out for evaluation')
+    parser.add_argument('--chunksize', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--raw-ages', action='store_true', help='do not log-transform driver/vehicle ages')
+    parser.add_argument('--work-dir', default=None, help='scratch directory for staged features (default: temp)')
+    parser.add_argument('--install', action='store_true', help='also replace backend/data/litemodel.sav')
+    args = parser.parse_args(argv)
+
+    from concurrent.futures import ProcessPoolExecutor
+    import joblib
+
+    started = time.time()
+    timings = {}
+    work_dir = tempfile.mkdtemp(prefix='drivesmart-train-', dir=args.work_dir)
+    try:
+        print('Staging features from', args.input)
+        t = time.time()
+        rows, skipped = stage_features(args.input, work_dir, args.chunksize, args.holdout, args.seed,
+                                       not args.raw_ages)
+        timings['stage_features'] = round(time.time() - t, 2)
+        if rows['train'] == 0:
+            raise SystemExit('no labelled training rows')
+        _, y = _open(work_dir, 'train', rows['train'])
+        class_counts = {str(c): int(n) for c, n in zip(*np.unique(np.asarray(y), return_counts=True))}
+
+        # Split the trees across workers; each gets its own seed and sample
+        workers = max(1, min(args.workers, args.trees))
+        split = [len(a) for a in np.array_split(np.arange(args.trees), workers)]
+        seeds = np.random.SeedSequence(args.seed).generate_state(workers).tolist()
+        params = {'max_leaf_nodes': args.max_leaf_nodes, 'min_samples_leaf': args.min_samples_leaf,
+                  'class_weight': args.class_weight}
+        print('Fitting {} trees on {} workers ({:,} training rows, up to {:,} per worker)'.format(
+            args.trees, workers, rows['train'], min(rows['train'], args.sample_rows)))
+        t = time.time()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_fit_subforest, [work_dir] * workers, [rows['train']] * workers, split,
+                                    [args.sample_rows] * workers, seeds, [params] * workers))
+        model = merge_forests([f for f, _ in results])
+        model.n_jobs = None
+        timings['fit'] = round(time.time() - t, 2)
+
+        t = time.time()
+        metrics = evaluate(model, work_dir, rows['holdout'], args.chunksize)
+        timings['evaluate'] = round(time.time() - t, 2)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    tmp = os.path.join(MODELS_DIR, '.litemodel-{}.tmp'.format(stamp))
+    joblib.dump(model, tmp)
+    with open(tmp, 'rb') as f:
+        sha = hashlib.sha1(f.read()).hexdigest()[:12]
+    name = 'litemodel-{}-{}'.format(stamp, sha)
+    out_path = os.path.join(MODELS_DIR, name + '.sav')
+    os.replace(tmp, out_path)
+
+    import sklearn
+    report = {
+        'model': os.path.relpath(out_path, ROOT),
+        'version': sha,
+        'trained_at': datetime.now().isoformat(),
+        'input': os.path.abspath(args.input),
+        'features': FEATURE_NAMES,
+        'log_ages': not args.raw_ages,
+        'label': {'column': LABEL_COLUMN, '2': 'fatal or serious', '3': 'slight'},
+        'rows': {'train': rows['train'], 'holdout': rows['holdout'], 'skipped_unlabelled': skipped},
+        'train_class_counts': class_counts,
+        'params': dict(params, trees=model.n_estimators, workers=workers, sample_rows=args.sample_rows,
+                       seed=args.seed, sklearn=sklearn.__version__),
+        'timings_s': dict(timings, total=round(time.time() - started, 2)),
+        'peak_memory_mb': {'main': _peak_rss_mb(), 'worker_max': max(m for _, m in results)},
+        'model_size_mb': round(os.path.getsize(out_path) / 2 ** 20, 2),
+        'holdout': metrics,
+    }
+    with open(os.path.join(MODELS_DIR, name + '.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.install:
+        tmp = MODEL_PATH + '.tmp'
+        shutil.copyfile(out_path, tmp)
+        os.replace(tmp, MODEL_PATH)
+        print('Installed as', MODEL_PATH)
+    print('Wrote {} (holdout accuracy {}) in {:.1f}s'.format(
+        out_path, metrics['accuracy'] if metrics else 'n/a', time.time() - started))
+
+
+if __name__ == '__main__':
+    main()